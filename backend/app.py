@@ -1,90 +1,357 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from datetime import datetime
+import os
+import base64
+import hashlib
+import heapq
 import json
+import numpy as np
 
 from config import Config
 from nlp_engine import GathaNLPEngine
-from book_processor import PROCESSED_BOOKS, nlp
+from book_processor import get_corpus, get_processed_books, nlp, on_publish
+from search_index import CatalogueIndex, AutocompleteIndex
+from http_cache import conditional_on_corpus
+from query_cache import QueryCache
+from vector_index import VectorIndex
+from related_books import RelatedBooksGraph
+from snapshot_builder import SnapshotBuilder
+from book_record import BookRecord
 from mock_database import MOCK_COLLECTIONS, MOCK_AUTHORS, VALID_CONTENT_TYPES, FOLK_SONG_TYPES
 
+class CatalogueJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes the corpus' BookRecords"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, BookRecord):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = CatalogueJSONProvider(app)
 app.config.from_object(Config)
 CORS(app, origins=Config.CORS_ORIGINS)
 
 nlp_engine = nlp
 
+AUTHORS_BY_ID = {author['id']: author for author in MOCK_AUTHORS}
+
 def get_book_by_id(book_id):
-    return next((b for b in PROCESSED_BOOKS if b['id'] == book_id), None)
+    return get_corpus().book(book_id)
 
 def get_books_by_ids(book_ids):
-    return [b for b in PROCESSED_BOOKS if b['id'] in book_ids]
+    return get_corpus().books_by_ids(book_ids)
 
-def filter_books(query=None, language=None, content_type=None, emotion=None):
-    results = PROCESSED_BOOKS.copy()
+# Bounded TTL+LRU caches for repeated queries (Config.CACHE_TIMEOUT); the corpus-backed
+# ones are dropped whenever a new corpus version is published
+search_cache = QueryCache('search')
+autocomplete_cache = QueryCache('autocomplete')
+query_emotion_cache = QueryCache('query_emotions')
+semantic_cache = QueryCache('semantic')
+
+def get_catalogue_index(corpus=None):
+    """Search index for a corpus snapshot (default: current), built once per snapshot"""
+    corpus = corpus or get_corpus()
+    return corpus.derived('catalogue_index', lambda c: CatalogueIndex(c.books))
+
+def get_semantic_index(corpus=None):
+    """Excerpt TF-IDF index for a corpus snapshot (default: current), fitted once per snapshot"""
+    corpus = corpus or get_corpus()
+    return corpus.derived(
+        'semantic_index',
+        lambda c: nlp_engine.build_semantic_index([book['excerpt'] for book in c.books])
+    )
+
+def build_vector_index(corpus):
+    """
+    Dense index of book excerpt embeddings, memory-mapped from NLP_CACHE_DIR. The file
+    is addressed by model and content, so it is embedded once and shared by all server
+    processes; files for older corpora are removed.
+    """
+    ids = [book['id'] for book in corpus.books]
+    excerpts = [book['excerpt'] for book in corpus.books]
+    key = hashlib.sha256(json.dumps(
+        [nlp_engine.embedding_fingerprint(), ids, excerpts], ensure_ascii=False
+    ).encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(Config.NLP_CACHE_DIR, f'book_vectors_{key}')
     
-    if query:
-        query_lower = query.lower()
-        matched_books = []
-        
-        for book in results:
-            author_match = (
-                book['author'].lower() == query_lower or 
-                query_lower in book['author'].lower() or
-                book.get('romanized_author', '').lower() == query_lower or
-                query_lower in book.get('romanized_author', '').lower()
-            )
-            
-            title_match = (
-                book['title'].lower() == query_lower or 
-                query_lower in book['title'].lower() or
-                book.get('romanized_title', '').lower() == query_lower or
-                query_lower in book.get('romanized_title', '').lower()
-            )
-            
-            keyword_match = False
-            if book.get('keywords'):
-                keyword_match = any(
-                    query_lower == kw.lower() or query_lower in kw.lower() 
-                    for kw in book['keywords']
-                )
-            
-            if author_match or title_match or keyword_match:
-                score = 0
-                if (book['author'].lower() == query_lower or 
-                    book.get('romanized_author', '').lower() == query_lower):
-                    score = 1000
-                elif (query_lower in book['author'].lower() or 
-                      query_lower in book.get('romanized_author', '').lower()):
-                    score = 500
-                elif (book['title'].lower() == query_lower or 
-                      book.get('romanized_title', '').lower() == query_lower):
-                    score = 800
-                elif (query_lower in book['title'].lower() or 
-                      query_lower in book.get('romanized_title', '').lower()):
-                    score = 300
-                elif keyword_match:
-                    score = 200
-                
-                matched_books.append((score, book))
+    index = VectorIndex.open_or_build(path, ids, lambda: nlp_engine.get_text_embeddings(excerpts))
+    if index is None:
+        return None
+    VectorIndex.prune(os.path.join(Config.NLP_CACHE_DIR, 'book_vectors_*'), [path])
+    if Config.VECTOR_INDEX_MODE == 'ivf':
+        index.build_ivf(Config.VECTOR_INDEX_IVF_LISTS, Config.VECTOR_INDEX_IVF_PROBES)
+    return index
+
+def build_related_books(corpus, vector_index=None):
+    """Related-books graph from emotion profiles, plus excerpt embeddings if a vector index is given"""
+    embeddings = vector_index.vectors if vector_index is not None else None
+    return RelatedBooksGraph(corpus.books, corpus.emotion_matrix, embeddings)
+
+def prepare_corpus(corpus):
+    """
+    Build a published snapshot's dense vector index (once IndicBERT is ready) and its
+    related-books graph. Runs on corpus_builder's thread, never on a request or at
+    publish: the graph is O(n²) in the number of books. book_processor republishes
+    the corpus once the model is ready, so the graph then gains excerpt embeddings.
+    """
+    index = None
+    if nlp_engine.model_state == 'ready':
+        index = corpus.peek('vector_index')
+        if index is None:
+            index = build_vector_index(corpus)
+    values = {'related_books': build_related_books(corpus, index)}
+    if index is not None:
+        values['vector_index'] = index
+    corpus.add_derived(values)
+
+corpus_builder = SnapshotBuilder(prepare_corpus, name='corpus-builder')
+if Config.BACKGROUND_INDEXES:
+    on_publish(corpus_builder.submit)
+    corpus_builder.submit(get_corpus())  # published while book_processor was imported
+
+def get_related_books(corpus, row, limit=3):
+    """
+    Up to `limit` books related to `row`, best first. While the snapshot's own graph
+    is being built, the last built snapshot's graph answers for the books both share.
+    """
+    graph = corpus.peek('related_books')
+    if graph is not None:
+        return [corpus.books[r] for r in graph.related(row, limit)]
+    
+    built = corpus_builder.latest
+    graph = built.peek('related_books') if built is not None else None
+    built_row = built.rows_by_id.get(corpus.books[row]['id']) if graph is not None else None
+    if built_row is None:
+        return []
+    related = (corpus.book(built.books[r]['id']) for r in graph.related(built_row, graph.k))
+    return [book for book in related if book is not None][:limit]
+
+def get_autocomplete_index(corpus=None):
+    """Autocomplete index for a corpus snapshot (default: current), built once per snapshot"""
+    corpus = corpus or get_corpus()
+    return corpus.derived('autocomplete_index', lambda c: AutocompleteIndex(c.books))
+
+# ✅ LOWERED THRESHOLDS FOR INDICBERT
+COLLECTION_TEMPLATES = [
+    {
+        'name': 'Devotional Classics',
+        'description': 'Sacred texts and devotional literature across Indian languages',
+        'emotion': 'devotion',
+        'threshold': 0.12
+    },
+    {
+        'name': 'Tales of Sorrow',
+        'description': 'Heart-wrenching stories of tragedy and loss',
+        'emotion': 'tragedy',
+        'threshold': 0.10
+    },
+    {
+        'name': 'Wisdom Literature',
+        'description': 'Philosophical texts and teachings of the sages',
+        'emotion': 'wisdom',
+        'threshold': 0.12
+    },
+    {
+        'name': 'Romantic Poetry',
+        'description': 'Love, longing, and romance in verse',
+        'emotion': 'romance',
+        'threshold': 0.10
+    },
+    {
+        'name': 'Melancholic Reflections',
+        'description': 'Contemplative works exploring sadness and solitude',
+        'emotion': 'melancholy',
+        'threshold': 0.12
+    },
+    {
+        'name': 'Inspirational Works',
+        'description': 'Uplifting stories of courage and hope',
+        'emotion': 'inspiration',
+        'threshold': 0.12
+    },
+    {
+        'name': 'Peaceful Contemplations',
+        'description': 'Serene writings for inner peace',
+        'emotion': 'peace',
+        'threshold': 0.10
+    },
+    {
+        'name': 'Joyful Celebrations',
+        'description': 'Festive and cheerful literature',
+        'emotion': 'joy',
+        'threshold': 0.10
+    }
+]
+
+def build_collections(corpus):
+    """
+    Emotion-threshold collections of a corpus snapshot, materialized once per snapshot.
+    Returns the public collection list and an id -> (collection, book rows) lookup.
+    """
+    collections = []
+    collections_by_id = {}
+    
+    collection_id = 1
+    for template in COLLECTION_TEMPLATES:
+        rows = corpus.rows_with_emotion(template['emotion'], template['threshold'], inclusive=True)
         
-        matched_books.sort(key=lambda x: x[0], reverse=True)
-        results = [book for score, book in matched_books]
+        if len(rows):
+            collection = {
+                'id': collection_id,
+                'name': template['name'],
+                'description': template['description'],
+                'emotion': template['emotion'],
+                'book_count': len(rows),
+                'book_ids': [corpus.books[row]['id'] for row in rows],
+                'classification_method': 'INDICBERT_EMOTION_ANALYSIS'
+            }
+            collections.append(collection)
+            collections_by_id[collection_id] = (collection, rows)
+            collection_id += 1
     
-    if language:
-        results = [b for b in results if b['language'].lower() == language.lower() or b['original_language'].lower() == language.lower()]
+    return collections, collections_by_id
+
+def build_statistics(corpus):
+    """Catalogue statistics of a corpus snapshot, materialized once per snapshot"""
+    languages = sorted(set(b['original_language'] for b in corpus.books))
     
-    if content_type:
-        if content_type.lower() not in [ct.lower() for ct in VALID_CONTENT_TYPES]:
-            return []
-        results = [b for b in results if b['content_type'].lower() == content_type.lower()]
+    return {
+        'total_books': len(corpus),
+        'total_authors': len(MOCK_AUTHORS),
+        'total_languages': len(languages),
+        'languages': languages,
+        'emotions': corpus.emotion_counts(0.15),
+        'content_types': VALID_CONTENT_TYPES
+    }
+
+# Sort orders accepted by /api/books and /api/search/advanced; an emotion name sorts
+# by that emotion's score, highest first
+SORT_OPTIONS = ['relevance', 'title', '-title', 'year', '-year'] + Config.EMOTIONS
+
+def _sort_key(corpus, sort):
+    """Key over (score, row) matches and whether to take the largest; ties keep corpus order"""
+    books = corpus.books
+    if sort == 'relevance':
+        return (lambda m: (-m[0], m[1])), False
+    if sort in corpus.emotion_columns:
+        scores = corpus.emotion_column(sort)
+        return (lambda m: (-scores[m[1]], m[1])), False
+    
+    field = sort.lstrip('-')
+    if field == 'title':
+        value = lambda row: (books[row].get('romanized_title') or books[row]['title']).casefold()
+    else:
+        value = lambda row: books[row].get(field)
+    # Books without a value (e.g. undated) come last in either direction
+    if sort.startswith('-'):
+        return (lambda m: (value(m[1]) is not None, value(m[1]) or 0, -m[1])), True
+    return (lambda m: (value(m[1]) is None, value(m[1]) or 0, m[1])), False
+
+def _match_books(corpus, query, language, content_type, emotion):
+    """Unordered (score, row) matches for the given filters in one corpus snapshot"""
+    # Text match tiers: author exact 1000, author partial 500, title exact 800,
+    # title partial 300, keyword 200 (see search_index)
+    matches = get_catalogue_index(corpus).match(query, language, content_type)
     
     if emotion:
-        results = [b for b in results if b['emotion'].get(emotion.lower(), 0) > 0.15]
+        scores = corpus.emotion_column(emotion)
+        if scores is None:
+            return []
+        rows = np.fromiter((row for _, row in matches), dtype=np.int64, count=len(matches))
+        keep = scores[rows] > 0.15
+        matches = [m for m, k in zip(matches, keep) if k]
+    
+    return matches
+
+def search_books(query=None, language=None, content_type=None, emotion=None,
+                 sort='relevance', offset=0, limit=None):
+    """
+    One page of matching books in `sort` order, plus the total number of matches.
+    With a limit, only the first offset+limit matches are selected (heap-based top-k)
+    instead of sorting every match.
+    """
+    if content_type and content_type.lower() not in [ct.lower() for ct in VALID_CONTENT_TYPES]:
+        return [], 0
+    
+    corpus = get_corpus()
+    cache_key = tuple((value or '').lower() for value in (query, language, content_type, emotion))
+    matches = search_cache.get_or_compute(
+        cache_key,
+        lambda: _match_books(corpus, query, language, content_type, emotion),
+        version=corpus.version
+    )
+    
+    key, largest = _sort_key(corpus, sort)
+    if limit is None:
+        ordered = sorted(matches, key=key, reverse=largest)[offset:]
+    else:
+        select = heapq.nlargest if largest else heapq.nsmallest
+        ordered = select(offset + limit, matches, key=key)[offset:]
+    
+    return [corpus.books[row] for _, row in ordered], len(matches)
+
+def filter_books(query=None, language=None, content_type=None, emotion=None):
+    books, _ = search_books(query, language, content_type, emotion)
+    return books
+
+def _encode_cursor(offset):
+    return base64.urlsafe_b64encode(f'o:{offset}'.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        if prefix == 'o' and int(offset) >= 0:
+            return int(offset)
+    except (ValueError, UnicodeError):
+        pass
+    raise ValueError(f'Invalid cursor: {cursor}')
+
+def _page_args():
+    """Parse sort, limit, cursor and fields query args: (page dict, error message)"""
+    sort = request.args.get('sort', 'relevance')
+    if sort not in SORT_OPTIONS:
+        return None, f'Invalid sort. Valid options: {", ".join(SORT_OPTIONS)}'
+    
+    limit = None
+    if request.args.get('limit'):
+        limit = request.args.get('limit', type=int)
+        if limit is None or limit < 1:
+            return None, 'limit must be a positive integer'
+        limit = min(limit, Config.MAX_PAGE_SIZE)
+    
+    offset = 0
+    if request.args.get('cursor'):
+        try:
+            offset = _decode_cursor(request.args['cursor'])
+        except ValueError as e:
+            return None, str(e)
     
-    return results
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    return {'sort': sort, 'offset': offset, 'limit': limit, 'fields': fields}, None
+
+def _project(books, fields):
+    """Keep only the requested fields (plus id) of each book"""
+    if not fields:
+        return books
+    wanted = ['id'] + [f for f in fields if f != 'id']
+    return [{f: book[f] for f in wanted if f in book} for book in books]
+
+def _page_response(books, total, page):
+    next_offset = page['offset'] + len(books)
+    has_more = page['limit'] is not None and next_offset < total
+    return {
+        'data': _project(books, page['fields']),
+        'count': len(books),
+        'total': total,
+        'next_cursor': _encode_cursor(next_offset) if has_more else None
+    }
 
 @app.route('/api/books', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_books():
     query = request.args.get('q', '')
     language = request.args.get('language', '')
@@ -97,22 +364,29 @@ def get_books():
             'error': f'Invalid content type. Valid types: {", ".join(VALID_CONTENT_TYPES)}'
         }), 400
     
-    books = filter_books(query, language, content_type, emotion)
+    page, error = _page_args()
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    books, total = search_books(query, language, content_type, emotion,
+                                page['sort'], page['offset'], page['limit'])
     return jsonify({
         'success': True,
-        'data': books,
-        'count': len(books),
+        **_page_response(books, total, page),
         'nlp_processed': True,
         'romanized_search': True
     })
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_book(book_id):
-    book = get_book_by_id(book_id)
-    if not book:
+    corpus = get_corpus()
+    row = corpus.rows_by_id.get(book_id)
+    if row is None:
         return jsonify({'success': False, 'error': 'Book not found'}), 404
     
-    related = [b for b in PROCESSED_BOOKS if b['id'] != book_id and any(e in b['emotion'] for e in book['emotion'])][:3]
+    book = corpus.books[row]
+    related = get_related_books(corpus, row, 3)
     
     return jsonify({
         'success': True,
@@ -123,26 +397,95 @@ def get_book(book_id):
 @app.route('/api/search/autocomplete', methods=['GET'])
 def search_autocomplete():
     query = request.args.get('q', '')
+    limit = request.args.get('limit', 5, type=int)
     
     if not query or len(query) < 2:
         return jsonify({'success': True, 'data': []})
     
-    suggestions_pool = []
-    for book in PROCESSED_BOOKS:
-        suggestions_pool.append(book['title'])
-        suggestions_pool.append(book['author'])
-        if book.get('romanized_title'):
-            suggestions_pool.append(book['romanized_title'])
-        if book.get('romanized_author'):
-            suggestions_pool.append(book['romanized_author'])
-    
-    suggestions = nlp_engine.generate_suggestions(query, suggestions_pool)
+    corpus = get_corpus()
+    suggestions = autocomplete_cache.get_or_compute(
+        (query.lower(), limit),
+        lambda: get_autocomplete_index(corpus).suggest(query, limit),
+        version=corpus.version
+    )
     
     return jsonify({
         'success': True,
         'data': suggestions
     })
 
+@app.route('/api/search/semantic', methods=['GET'])
+def semantic_search():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    
+    if not query.strip():
+        return jsonify({'success': False, 'error': 'Query parameter q is required'}), 400
+    if limit is None or not 1 <= limit <= Config.MAX_PAGE_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'limit must be between 1 and {Config.MAX_PAGE_SIZE}'
+        }), 400
+    
+    corpus = get_corpus()
+    matches = semantic_cache.get_or_compute(
+        (query, limit),
+        lambda: get_semantic_index(corpus).search(query, limit, min_score=0.0),
+        version=corpus.version
+    )
+    
+    return jsonify({
+        'success': True,
+        'data': [{**corpus.books[row], 'similarity': round(score, 4)} for row, score in matches],
+        'count': len(matches),
+        'method': 'TFIDF_CHAR_NGRAM'
+    })
+
+@app.route('/api/search/similar', methods=['GET'])
+def similar_search():
+    """Nearest books by IndicBERT embedding, to a free-text query (q) or to a book (book_id)"""
+    query = request.args.get('q', '')
+    book_id = request.args.get('book_id', type=int)
+    limit = request.args.get('limit', 10, type=int)
+    
+    if not query.strip() and book_id is None:
+        return jsonify({'success': False, 'error': 'Provide a query (q) or a book_id'}), 400
+    if limit is None or not 1 <= limit <= Config.MAX_PAGE_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'limit must be between 1 and {Config.MAX_PAGE_SIZE}'
+        }), 400
+    if nlp_engine.model_state != 'ready':
+        return jsonify({
+            'success': False,
+            'error': 'IndicBERT is not ready yet',
+            'model': nlp_engine.model_status()
+        }), 503
+    
+    corpus = get_corpus()
+    index = corpus.peek('vector_index')  # built in the background by prepare_corpus
+    if index is None:
+        return jsonify({'success': False, 'error': 'Book embeddings are not available yet'}), 503
+    
+    if book_id is not None:
+        vector = index.vector(book_id)
+        if vector is None:
+            return jsonify({'success': False, 'error': 'Book not found'}), 404
+        matches = index.search(vector, limit, exclude=[book_id])
+    else:
+        vector = nlp_engine.get_text_embedding(query)
+        if vector is None:
+            return jsonify({'success': False, 'error': 'Could not embed the query'}), 503
+        matches = index.search(vector, limit)
+    
+    return jsonify({
+        'success': True,
+        'data': [{**corpus.book(id_), 'similarity': round(score, 4)} for id_, score in matches],
+        'count': len(matches),
+        'method': 'INDICBERT_DENSE',
+        'index_mode': 'ivf' if index.n_probe else 'exact'
+    })
+
 @app.route('/api/search/advanced', methods=['GET'])
 def advanced_search():
     query = request.args.get('q', '')
@@ -156,28 +499,37 @@ def advanced_search():
             'error': f'Invalid content type. Valid types: {", ".join(VALID_CONTENT_TYPES)}'
         }), 400
     
-    books = filter_books(query, language, content_type, emotion)
+    page, error = _page_args()
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    books, total = search_books(query, language, content_type, emotion,
+                                page['sort'], page['offset'], page['limit'])
     
     detected_emotion = None
     if not emotion and query:
-        emotion_scores = nlp_engine.extract_emotion_scores(query)
+        emotion_scores = query_emotion_cache.get_or_compute(
+            (query, nlp_engine.model_state),
+            lambda: nlp_engine.extract_emotion_scores(query)
+        )
         detected_emotion = max(emotion_scores, key=emotion_scores.get)
     
     return jsonify({
         'success': True,
-        'data': books,
-        'count': len(books),
+        **_page_response(books, total, page),
         'detected_emotion': detected_emotion,
         'romanized_search': True,
         'filters': {
             'query': query,
             'language': language,
             'content_type': content_type,
-            'emotion': emotion
+            'emotion': emotion,
+            'sort': page['sort']
         }
     })
 
 @app.route('/api/books/<int:book_id>/emotions', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_book_emotions(book_id):
     book = get_book_by_id(book_id)
     if not book:
@@ -194,6 +546,7 @@ def get_book_emotions(book_id):
     })
 
 @app.route('/api/content-types', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_content_types():
     return jsonify({
         'success': True,
@@ -219,80 +572,48 @@ def nlp_test():
         'message': 'NLP engine is working! This is LIVE analysis for INDIAN LANGUAGES ONLY.'
     })
 
-@app.route('/api/collections', methods=['GET'])
-def get_collections():
-    collections = []
+@app.route('/api/nlp/analyze', methods=['POST'])
+def analyze_texts():
+    """Batch version of /api/debug/nlp-test: {"texts": [...]} (or a bare JSON array)"""
+    payload = request.get_json(silent=True)
+    texts = payload.get('texts') if isinstance(payload, dict) else payload
     
-    # ✅ LOWERED THRESHOLDS FOR INDICBERT
-    collection_templates = [
-        {
-            'name': 'Devotional Classics',
-            'description': 'Sacred texts and devotional literature across Indian languages',
-            'emotion': 'devotion',
-            'threshold': 0.12
-        },
-        {
-            'name': 'Tales of Sorrow',
-            'description': 'Heart-wrenching stories of tragedy and loss',
-            'emotion': 'tragedy',
-            'threshold': 0.10
-        },
-        {
-            'name': 'Wisdom Literature',
-            'description': 'Philosophical texts and teachings of the sages',
-            'emotion': 'wisdom',
-            'threshold': 0.12
-        },
-        {
-            'name': 'Romantic Poetry',
-            'description': 'Love, longing, and romance in verse',
-            'emotion': 'romance',
-            'threshold': 0.10
-        },
-        {
-            'name': 'Melancholic Reflections',
-            'description': 'Contemplative works exploring sadness and solitude',
-            'emotion': 'melancholy',
-            'threshold': 0.12
-        },
-        {
-            'name': 'Inspirational Works',
-            'description': 'Uplifting stories of courage and hope',
-            'emotion': 'inspiration',
-            'threshold': 0.12
-        },
-        {
-            'name': 'Peaceful Contemplations',
-            'description': 'Serene writings for inner peace',
-            'emotion': 'peace',
-            'threshold': 0.10
-        },
-        {
-            'name': 'Joyful Celebrations',
-            'description': 'Festive and cheerful literature',
-            'emotion': 'joy',
-            'threshold': 0.10
-        }
-    ]
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+        return jsonify({'success': False, 'error': 'Expected a non-empty JSON array of strings in "texts"'}), 400
+    if len(texts) > Config.NLP_ANALYZE_MAX_TEXTS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {Config.NLP_ANALYZE_MAX_TEXTS} texts per request'
+        }), 413
+    too_long = [i for i, t in enumerate(texts) if len(t) > Config.NLP_ANALYZE_MAX_CHARS]
+    if too_long:
+        return jsonify({
+            'success': False,
+            'error': f'Texts longer than {Config.NLP_ANALYZE_MAX_CHARS} characters: {too_long[:10]}'
+        }), 413
     
-    collection_id = 1
-    for template in collection_templates:
-        books_in_collection = [
-            book for book in PROCESSED_BOOKS 
-            if book['emotion'].get(template['emotion'], 0) >= template['threshold']
-        ]
-        
-        if books_in_collection:
-            collections.append({
-                'id': collection_id,
-                'name': template['name'],
-                'description': template['description'],
-                'emotion': template['emotion'],
-                'book_count': len(books_in_collection),
-                'book_ids': [book['id'] for book in books_in_collection],
-                'classification_method': 'INDICBERT_EMOTION_ANALYSIS'
-            })
-            collection_id += 1
+    # One batched forward pass for the model stage of every text
+    all_emotions = nlp_engine.extract_emotion_scores_batch(texts)
+    
+    return jsonify({
+        'success': True,
+        'count': len(texts),
+        'data': [
+            {
+                'emotions': emotions,
+                'detected_language': nlp_engine.detect_language(text),
+                'preprocessed': nlp_engine.preprocess_text(text),
+                'key_phrases': nlp_engine.extract_phrases(text)
+            }
+            for text, emotions in zip(texts, all_emotions)
+        ],
+        'emotion_source': 'INDICBERT_HYBRID_70_30' if nlp_engine.emotion_prototypes is not None else 'KEYWORD_ONLY'
+    })
+
+@app.route('/api/collections', methods=['GET'])
+@conditional_on_corpus(get_corpus)
+def get_collections():
+    collections, _ = get_corpus().derived('collections', build_collections)
     
     return jsonify({
         'success': True,
@@ -302,15 +623,17 @@ def get_collections():
     })
 
 @app.route('/api/collections/<int:collection_id>', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_collection(collection_id):
-    collections_response = get_collections()
-    collections = collections_response.get_json()['data']
+    corpus = get_corpus()
+    _, collections_by_id = corpus.derived('collections', build_collections)
     
-    collection = next((c for c in collections if c['id'] == collection_id), None)
-    if not collection:
+    entry = collections_by_id.get(collection_id)
+    if not entry:
         return jsonify({'success': False, 'error': 'Collection not found'}), 404
     
-    books = get_books_by_ids(collection['book_ids'])
+    collection, rows = entry
+    books = [corpus.books[row] for row in rows]
     
     return jsonify({
         'success': True,
@@ -321,6 +644,7 @@ def get_collection(collection_id):
     })
 
 @app.route('/api/authors', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_authors():
     return jsonify({
         'success': True,
@@ -329,12 +653,13 @@ def get_authors():
     })
 
 @app.route('/api/authors/<int:author_id>', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_author(author_id):
-    author = next((a for a in MOCK_AUTHORS if a['id'] == author_id), None)
+    author = AUTHORS_BY_ID.get(author_id)
     if not author:
         return jsonify({'success': False, 'error': 'Author not found'}), 404
     
-    books = [b for b in PROCESSED_BOOKS if b['author'] == author['name']]
+    books = get_corpus().books_by_author(author['name'])
     
     return jsonify({
         'success': True,
@@ -343,44 +668,61 @@ def get_author(author_id):
     })
 
 @app.route('/api/statistics', methods=['GET'])
+@conditional_on_corpus(get_corpus)
 def get_statistics():
-    total_books = len(PROCESSED_BOOKS)
-    total_authors = len(MOCK_AUTHORS)
-    languages = list(set(b['original_language'] for b in PROCESSED_BOOKS))
-    emotions = {}
-    
-    for emotion in Config.EMOTIONS:
-        emotions[emotion] = len([b for b in PROCESSED_BOOKS if b['emotion'].get(emotion, 0) > 0.15])
-    
     return jsonify({
         'success': True,
-        'data': {
-            'total_books': total_books,
-            'total_authors': total_authors,
-            'total_languages': len(languages),
-            'languages': languages,
-            'emotions': emotions,
-            'content_types': VALID_CONTENT_TYPES
-        }
+        'data': get_corpus().derived('statistics', build_statistics)
     })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({
+    """
+    Liveness by default. With `?ready=1` this is a readiness probe that answers
+    503 until IndicBERT has loaded and warmed up.
+    """
+    model_status = nlp_engine.model_status()
+    ready = model_status['state'] == 'ready'
+    corpus = get_corpus()
+    
+    response = jsonify({
         'success': True,
         'status': 'Gatha NLP Backend (IndicBERT + Romanized Search)',
         'nlp_active': True,
         'romanized_search': True,
         'indicbert_loaded': nlp_engine.model is not None,
-        'books_processed': len(PROCESSED_BOOKS),
+        'ready': ready,
+        'model': model_status,
+        'books_processed': len(get_processed_books()),
+        'corpus': {
+            'version': corpus.version,
+            'revision': corpus.revision,
+            # False while the background build (prepare_corpus) is still running
+            'related_books_built': corpus.peek('related_books') is not None,
+            'vector_index_built': corpus.peek('vector_index') is not None
+        },
+        'caches': {
+            cache.name: cache.stats()
+            for cache in (search_cache, autocomplete_cache, query_emotion_cache, semantic_cache)
+        },
         'valid_content_types': VALID_CONTENT_TYPES,
         'timestamp': datetime.now().isoformat()
     })
+    if request.args.get('ready') == '1' and not ready:
+        return response, 503
+    return response
 
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'success': False, 'error': 'Endpoint not found'}), 404
 
+@app.errorhandler(413)
+def payload_too_large(error):
+    return jsonify({
+        'success': False,
+        'error': f'Request body larger than {Config.MAX_CONTENT_LENGTH} bytes'
+    }), 413
+
 @app.errorhandler(500)
 def server_error(error):
     return jsonify({'success': False, 'error': 'Internal server error'}), 500
@@ -389,25 +731,28 @@ if __name__ == '__main__':
     print("\n" + "="*60)
     print("GATHA NLP BACKEND SERVER IS STARTING")
     print("="*60)
-    print("IndicBERT Pre-trained Model: LOADED")
+    print(f"IndicBERT Pre-trained Model: {nlp_engine.model_state.upper()}")
     print("Romanized Search: ENABLED")
     print("="*60)
     print("\nAvailable endpoints:")
-    print("  GET  /api/health")
-    print("  GET  /api/books")
+    print("  GET  /api/health[?ready=1]")
+    print("  GET  /api/books[?limit=&cursor=&sort=&fields=]")
     print("  GET  /api/books/<id>")
     print("  GET  /api/books/<id>/emotions")
     print("  GET  /api/content-types")
-    print("  GET  /api/search/autocomplete?q=query")
+    print("  GET  /api/search/autocomplete?q=query[&limit=5]")
+    print("  GET  /api/search/semantic?q=query[&limit=10]")
+    print("  GET  /api/search/similar?q=query|book_id=<id>[&limit=10]")
     print("  GET  /api/search/advanced")
     print("  GET  /api/debug/nlp-test?text=...")
+    print("  POST /api/nlp/analyze {\"texts\": [...]}")
     print("  GET  /api/collections (IndicBERT-Generated)")
     print("  GET  /api/collections/<id>")
     print("  GET  /api/authors")
     print("  GET  /api/authors/<id>")
     print("  GET  /api/statistics")
     print("\n" + "="*60)
-    print(f"{len(PROCESSED_BOOKS)} books processed with IndicBERT")
+    print(f"{len(get_processed_books())} books processed with IndicBERT")
     print(f" Valid content types: {', '.join(VALID_CONTENT_TYPES)}")
     print("="*60)
     print("\nServer running on http://localhost:5000\n")
@@ -0,0 +1 @@
+"""Benchmarks for the catalogue and NLP hot paths; run from backend/ with python -m benchmarks.run_benchmarks"""
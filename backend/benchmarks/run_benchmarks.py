@@ -0,0 +1,293 @@
+"""
+Benchmark the catalogue and NLP hot paths on synthetic catalogues.
+
+    python -m benchmarks.run_benchmarks [--sizes 1000 10000 100000] [--json results.json] [--compare baseline.json]
+
+For every catalogue size a synthetic corpus (see synthetic_corpus.py) is published
+and filter_books, autocomplete, /api/collections, /api/statistics and the
+semantic index search are timed, along with the one-off cost of building each
+per-corpus index (the O(n²) related-books graph, which the server builds in the
+background, only up to --related-max books). Per-text NLP functions
+(extract_emotion_scores with keywords only and with the model, detect_language,
+extract_phrases) are timed once on a sample of excerpts. Model timings use a small randomly initialized BERT written to a
+temporary directory, so no download is needed; they are skipped when
+torch/transformers are not installed.
+
+Everything runs against a temporary NLP cache directory. Results are written as
+JSON; with --compare, mean times are compared against an earlier report and
+benchmarks slower by more than --threshold are listed as regressions.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import subprocess
+import contextlib
+import importlib.util
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+TINY_MODEL_CONFIG = {
+    'hidden_size': 64,
+    'num_hidden_layers': 2,
+    'num_attention_heads': 4,
+    'intermediate_size': 128,
+    'max_position_embeddings': 512,
+}
+
+
+def make_tiny_model(directory: str, texts: Sequence[str], seed: int = 0) -> Dict:
+    """Save a randomly initialized character-level BERT that can tokenize `texts`"""
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    os.makedirs(directory, exist_ok=True)
+    chars = sorted({ch for text in texts for ch in text if not ch.isspace()})
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + chars + ['##' + ch for ch in chars]
+    vocab_path = os.path.join(directory, 'vocab.txt')
+    with open(vocab_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(vocab))
+    tokenizer = BertTokenizerFast(vocab_path, do_lower_case=False, tokenize_chinese_chars=False, strip_accents=False)
+
+    torch.manual_seed(seed)
+    model = BertModel(BertConfig(vocab_size=len(vocab), **TINY_MODEL_CONFIG))
+    model.save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return {'vocab_size': len(vocab), **TINY_MODEL_CONFIG}
+
+
+def timings(fn: Callable, calls: Sequence[tuple], before: Callable = None) -> Dict:
+    """Latency statistics of `fn(*args)` for each args tuple; `before()` runs untimed before each call"""
+    samples = []
+    for args in calls:
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    samples = np.array(samples) * 1000
+    return {
+        'calls': len(samples),
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(np.percentile(samples, 50)), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+        'max_ms': round(float(samples.max()), 4),
+    }
+
+
+def once(fn: Callable) -> Dict:
+    started = time.perf_counter()
+    fn()
+    return {'seconds': round(time.perf_counter() - started, 4)}
+
+
+def filter_queries(books: List[Dict], rng, count: int) -> List[tuple]:
+    """(query, language, content_type, emotion) filters drawn from the corpus"""
+    from config import Config
+    queries = []
+    for i in range(count):
+        book = books[rng.integers(len(books))]
+        kind = i % 6
+        if kind == 0:
+            queries.append((book['author'], None, None, None))
+        elif kind == 1:
+            queries.append((book['title'].split()[0], None, None, None))
+        elif kind == 2:
+            queries.append((book['romanized_title'][:4], book['language'], None, None))
+        elif kind == 3:
+            queries.append((book['keywords'][0], None, None, Config.EMOTIONS[i % len(Config.EMOTIONS)]))
+        elif kind == 4:
+            queries.append((None, book['language'], book['content_type'], None))
+        else:
+            queries.append((book['romanized_author'].split()[-1], None, book['content_type'], None))
+    return queries
+
+
+def autocomplete_queries(books: List[Dict], rng, count: int) -> List[tuple]:
+    queries = []
+    for i in range(count):
+        book = books[rng.integers(len(books))]
+        text = (book['title'], book['romanized_title'], book['author'], book['romanized_author'])[i % 4]
+        queries.append((text[:int(rng.integers(2, 6))], 5))
+    return queries
+
+
+def benchmark_catalogue(app_module, books: List[Dict], rng, queries: int, related_max: int) -> Dict:
+    import book_processor
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results['publish'] = once(lambda: book_processor.publish_processed_books(books))
+    corpus = app_module.get_corpus()
+    excerpts = [book['excerpt'] for book in corpus.books]
+
+    # One-off cost of the per-corpus indexes, built lazily on first use
+    results['build_catalogue_index'] = once(lambda: app_module.get_catalogue_index(corpus))
+    results['build_autocomplete_index'] = once(lambda: app_module.get_autocomplete_index(corpus))
+    results['build_collections'] = once(lambda: corpus.derived('collections', app_module.build_collections))
+    results['build_statistics'] = once(lambda: corpus.derived('statistics', app_module.build_statistics))
+    results['build_semantic_index'] = once(lambda: app_module.get_semantic_index(corpus))
+    if len(corpus) <= related_max:
+        # Built in the background in the server; emotion profiles only here
+        results['build_related_books'] = once(lambda: app_module.build_related_books(corpus))
+
+    # Query caches are cleared before every call so the matching itself is timed
+    results['filter_books'] = timings(
+        app_module.filter_books, filter_queries(corpus.books, rng, queries),
+        before=app_module.search_cache.clear
+    )
+    autocomplete = app_module.get_autocomplete_index(corpus)
+    results['autocomplete'] = timings(autocomplete.suggest, autocomplete_queries(corpus.books, rng, queries))
+
+    client = app_module.app.test_client()
+    results['get_collections'] = timings(lambda: client.get('/api/collections'), [()] * queries)
+    results['get_statistics'] = timings(lambda: client.get('/api/statistics'), [()] * queries)
+
+    semantic_queries = [(' '.join(excerpts[rng.integers(len(excerpts))].split()[:3]), 5) for _ in range(queries)]
+    results['semantic_search'] = timings(app_module.get_semantic_index(corpus).search, semantic_queries)
+    return results
+
+
+def benchmark_text(engine, texts: List[str]) -> Dict:
+    results = {
+        'extract_emotion_scores_keywords': timings(
+            lambda text: engine.extract_emotion_scores(text, use_model=False), [(t,) for t in texts]
+        ),
+        'detect_language': timings(engine.detect_language, [(t,) for t in texts]),
+        'extract_phrases': timings(
+            lambda text: engine.extract_phrases(engine.preprocess_text(text)), [(t,) for t in texts]
+        ),
+    }
+    if engine.model is not None:
+        # Time the model itself, not the embedding cache
+        engine.embedding_cache = None
+        engine.extract_emotion_scores(texts[0])  # warm up
+        results['extract_emotion_scores_model'] = timings(engine.extract_emotion_scores, [(t,) for t in texts])
+        results['extract_emotion_scores_batch_model'] = once(lambda: engine.extract_emotion_scores_batch(texts))
+    return results
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Benchmarks whose mean (or one-off) time grew by more than `threshold` times"""
+    regressions = []
+    for size, benchmarks in report['results'].items():
+        for name, result in benchmarks.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if not previous:
+                continue
+            key = 'mean_ms' if 'mean_ms' in result else 'seconds'
+            if previous.get(key) and result[key] / previous[key] > threshold:
+                regressions.append({'size': size, 'benchmark': name, 'metric': key,
+                                    'baseline': previous[key], 'current': result[key],
+                                    'ratio': round(result[key] / previous[key], 2)})
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark catalogue and NLP hot paths on synthetic corpora')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000], help='catalogue sizes (books)')
+    parser.add_argument('--queries', type=int, default=50, help='timed calls per catalogue benchmark')
+    parser.add_argument('--text-sample', type=int, default=200, help='excerpts for the per-text NLP benchmarks')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-model', action='store_true', help='skip the random-init transformer benchmarks')
+    parser.add_argument('--json', help='write the report to this file (default: stdout)')
+    parser.add_argument('--compare', help='earlier report to compare mean times against')
+    parser.add_argument('--related-max', type=int, default=20000,
+                        help='largest catalogue whose O(n²) related-books graph build is timed')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='gatha-bench-')
+    use_model = not args.no_model and all(
+        importlib.util.find_spec(name) is not None for name in ('torch', 'transformers')
+    )
+    # Config reads the environment when first imported, so set it up before importing the backend
+    os.environ.pop('GATHA_BOOKS_STORE', None)
+    os.environ['GATHA_NLP_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    os.environ['GATHA_NLP_MODEL'] = os.path.join(workdir, 'model')
+    os.environ['GATHA_NLP_BACKGROUND_LOAD'] = '0'
+    # No background index builds competing for the CPU; the graph is timed on its own
+    os.environ['GATHA_BACKGROUND_INDEXES'] = '0'
+
+    try:
+        from benchmarks.synthetic_corpus import SyntheticCatalogue, engine_lexicons, language_vocabularies
+        vocabularies = language_vocabularies(*engine_lexicons())
+        model_config = None
+        if use_model:
+            words = [w for vocabulary in vocabularies.values() for pool in vocabulary.values() for w in pool]
+            model_config = make_tiny_model(os.environ['GATHA_NLP_MODEL'],
+                                           words + ['abcdefghijklmnopqrstuvwxyz.,?!।॥'], seed=args.seed)
+
+        print("🚀 Loading backend...", file=sys.stderr)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app as app_module
+        from nlp_engine import NLP_ENGINE_VERSION
+
+        catalogue = SyntheticCatalogue(vocabularies, seed=args.seed)
+        rng = np.random.default_rng(args.seed)
+        results = {}
+        for size in args.sizes:
+            print(f"📚 {size} books...", file=sys.stderr)
+            started = time.perf_counter()
+            books = list(catalogue.books(size))
+            generate_seconds = time.perf_counter() - started
+            results[str(size)] = {'generate': {'seconds': round(generate_seconds, 4)},
+                                  **benchmark_catalogue(app_module, books, rng, args.queries, args.related_max)}
+            del books
+
+        print("🧪 Per-text NLP benchmarks...", file=sys.stderr)
+        sample = [book['excerpt'] for book in SyntheticCatalogue(vocabularies, seed=args.seed + 1).books(args.text_sample)]
+        results['text'] = benchmark_text(app_module.nlp_engine, sample)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'nlp_engine_version': NLP_ENGINE_VERSION,
+            'model': model_config,
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.threshold)
+        for regression in report['regressions']:
+            print(f"⚠️ {regression['benchmark']} ({regression['size']}): "
+                  f"{regression['baseline']} -> {regression['current']} {regression['metric']} "
+                  f"(x{regression['ratio']})", file=sys.stderr)
+        if not report['regressions']:
+            print(f"✅ No regressions over x{args.threshold} against {args.compare}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"💾 Report written to {args.json}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
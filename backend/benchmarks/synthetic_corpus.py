@@ -0,0 +1,174 @@
+"""
+Synthetic multilingual catalogue for benchmarks, at any size.
+
+Books are generated in the shape of processed MOCK_BOOKS records. Excerpts,
+titles and author names are drawn from the MOCK_BOOKS excerpts and the NLP
+engine's emotion lexicon and stop words, each in its language's script, so
+search, language detection and keyword scoring see realistic text. Emotion scores
+are random (Dirichlet), not computed.
+
+    python -m benchmarks.synthetic_corpus --count 100000 --out synthetic.jsonl [--catalogue-only]
+
+`--catalogue-only` leaves out the NLP fields, for feeding the file to ingest.py.
+"""
+import re
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, Iterator, List
+
+from config import Config
+from mock_database import MOCK_BOOKS, MOCK_AUTHORS, VALID_CONTENT_TYPES
+from language_detector import detect_language
+
+LANGUAGES = sorted({book['language'] for book in MOCK_BOOKS})
+CONTENT_TYPE_WEIGHTS = {'prose': 0.4, 'poetry': 0.25, 'bhajan': 0.1, 'doha': 0.1, 'songs': 0.1, 'folk_songs': 0.05}
+ROMAN_SYLLABLES = ('ka', 'ra', 'ma', 'na', 'sa', 'ta', 'pa', 'la', 'va', 'ha', 'de', 'vi', 'shi', 'ku',
+                   'ran', 'gan', 'dha', 'ya', 'ni', 'ro', 'ja', 'bha', 'ti', 'su', 'an', 'ar', 'om')
+SENTENCE_END = {'Hindi': '।', 'Marathi': '।', 'Bengali': '।', 'Tamil': '.', 'Kannada': '.'}
+_PUNCTUATION = re.compile(r'[।॥,.?!;:"\'()\-]+')
+
+# Share of excerpt words drawn from the emotion lexicon and from stop words
+LEXICON_SHARE = 0.1
+STOP_WORD_SHARE = 0.15
+
+
+def language_vocabularies(emotion_keywords: Dict[str, List[str]], stop_words) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Per language: 'words' from that language's MOCK_BOOKS excerpts and titles, plus
+    'lexicon' and 'stop' words in its script (Devanagari ones serve Hindi and Marathi)
+    """
+    vocabularies = {language: {'words': set(), 'lexicon': set(), 'stop': set()} for language in LANGUAGES}
+    for book in MOCK_BOOKS:
+        text = f"{book['title']} {book['excerpt']}"
+        vocabularies[book['language']]['words'].update(_PUNCTUATION.sub(' ', text).split())
+
+    def add(words, kind):
+        for word in words:
+            language = detect_language(word, default=None)
+            targets = ('Hindi', 'Marathi') if language in ('Hindi', 'Marathi') else (language,)
+            for target in targets:
+                if target in vocabularies:
+                    vocabularies[target][kind].add(word)
+
+    add({word for words in emotion_keywords.values() for word in words}, 'lexicon')
+    add(stop_words, 'stop')
+    return {
+        language: {kind: sorted(words) for kind, words in vocabulary.items()}
+        for language, vocabulary in vocabularies.items()
+    }
+
+
+def _pick(rng, pool: List[str], size, replace: bool = True) -> List[str]:
+    return [pool[i] for i in rng.choice(len(pool), size=size, replace=replace)]
+
+
+class SyntheticCatalogue:
+    """Deterministic (for a seed) generator of synthetic processed book records"""
+
+    def __init__(self, vocabularies: Dict[str, Dict[str, List[str]]], seed: int = 0,
+                 books_per_author: int = 25):
+        self.vocabularies = vocabularies
+        self.seed = seed
+        self.books_per_author = books_per_author
+        self.keywords = sorted({kw for book in MOCK_BOOKS for kw in book['keywords']})
+        self.themes = sorted({theme for book in MOCK_BOOKS for theme in book['themes']})
+        self.content_types = [ct for ct in VALID_CONTENT_TYPES if ct in CONTENT_TYPE_WEIGHTS]
+        weights = np.array([CONTENT_TYPE_WEIGHTS[ct] for ct in self.content_types])
+        self.content_type_p = weights / weights.sum()
+
+    def _roman(self, rng, words: int) -> str:
+        return ' '.join(''.join(_pick(rng, ROMAN_SYLLABLES, rng.integers(2, 4))) for _ in range(words))
+
+    def _authors(self, rng, count: int) -> Dict[str, List[tuple]]:
+        """(native, romanized) author names per language; the MOCK_AUTHORS come first"""
+        per_language = max(1, count // (self.books_per_author * len(LANGUAGES)))
+        authors = {language: [] for language in LANGUAGES}
+        for author in MOCK_AUTHORS:
+            if author['language'] in authors:
+                romanized = next((b['romanized_author'] for b in MOCK_BOOKS if b['author'] == author['name']), '')
+                authors[author['language']].append((author['name'], romanized or self._roman(rng, 2)))
+        for language, names in authors.items():
+            words = self.vocabularies[language]['words']
+            while len(names) < per_language:
+                native = ' '.join(_pick(rng, words, 2))
+                names.append((native, self._roman(rng, 2)))
+        return authors
+
+    def _excerpt(self, rng, language: str) -> str:
+        vocabulary = self.vocabularies[language]
+        length = int(rng.integers(40, 120))
+        sources = rng.choice(3, size=length, p=[1 - LEXICON_SHARE - STOP_WORD_SHARE, LEXICON_SHARE, STOP_WORD_SHARE])
+        words = []
+        for source in sources:
+            pool = (vocabulary['words'], vocabulary['lexicon'], vocabulary['stop'])[source] or vocabulary['words']
+            words.append(pool[rng.integers(len(pool))])
+        end = SENTENCE_END.get(language, '.')
+        for i in range(int(rng.integers(6, 14)), length, int(rng.integers(6, 14))):
+            words[i - 1] += end
+        return ' '.join(words) + end
+
+    def books(self, count: int, catalogue_only: bool = False) -> Iterator[Dict]:
+        rng = np.random.default_rng(self.seed)
+        authors = self._authors(rng, count)
+        languages = rng.choice(len(LANGUAGES), size=count)
+        content_types = rng.choice(len(self.content_types), size=count, p=self.content_type_p)
+        emotions = rng.dirichlet(np.full(len(Config.EMOTIONS), 0.4), size=count)
+
+        for i in range(count):
+            language = LANGUAGES[languages[i]]
+            author, romanized_author = authors[language][rng.integers(len(authors[language]))]
+            title_words = _pick(rng, self.vocabularies[language]['words'], rng.integers(1, 4))
+            excerpt = self._excerpt(rng, language)
+            book = {
+                'id': i + 1,
+                'title': ' '.join(title_words),
+                'romanized_title': self._roman(rng, len(title_words)),
+                'author': author,
+                'romanized_author': romanized_author,
+                'cover_image': f'/covers/synthetic-{i + 1}.jpg',
+                'language': language,
+                'original_language': language,
+                'content_type': self.content_types[content_types[i]],
+                'year': None if rng.random() < 0.05 else int(rng.integers(1000, 2024)),
+                'excerpt': excerpt,
+                'keywords': _pick(rng, self.keywords, rng.integers(3, 8), replace=False),
+                'characters': _pick(rng, self.vocabularies[language]['words'], rng.integers(0, 5)),
+                'themes': _pick(rng, self.themes, rng.integers(2, 5), replace=False),
+            }
+            if not catalogue_only:
+                book.update({
+                    'emotion': {e: round(float(s), 4) for e, s in zip(Config.EMOTIONS, emotions[i])},
+                    'emotion_source': 'SYNTHETIC',
+                    'detected_language': language,
+                    'extracted_phrases': excerpt.split()[:5],
+                })
+            yield book
+
+
+def engine_lexicons():
+    """Emotion keywords and stop words of the NLP engine, without loading a model"""
+    from nlp_engine import GathaNLPEngine
+    lexicons = GathaNLPEngine.__new__(GathaNLPEngine)
+    return lexicons._load_emotion_keywords(), lexicons._load_stop_words()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic multilingual catalogue (JSONL)')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='JSONL file to write')
+    parser.add_argument('--catalogue-only', action='store_true',
+                        help='leave out NLP fields (emotion etc.), e.g. as input for ingest.py')
+    args = parser.parse_args(argv)
+
+    catalogue = SyntheticCatalogue(language_vocabularies(*engine_lexicons()), seed=args.seed)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        for book in catalogue.books(args.count, catalogue_only=args.catalogue_only):
+            f.write(json.dumps(book, ensure_ascii=False) + '\n')
+    print(f"💾 Wrote {args.count} synthetic books to {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
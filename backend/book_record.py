@@ -0,0 +1,83 @@
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterator
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class BookRecord(Mapping):
+    """
+    Read-only, compact book record with the dict interface the API code uses
+    (`book['title']`, `book.get('year')`, `{**book}`).
+
+    Catalogue and NLP fields live in `__slots__` instead of a per-book dict; a slot
+    that was never assigned is a missing key. Any other field goes in `_extra`.
+    Strings that repeat across books (language, content type, author, emotion
+    names, keywords ...) are interned, and list fields are stored as tuples.
+    """
+
+    FIELDS = (
+        'id', 'title', 'romanized_title', 'author', 'romanized_author', 'cover_image',
+        'language', 'original_language', 'content_type', 'year', 'excerpt',
+        'keywords', 'characters', 'themes',
+        'emotion', 'emotion_source', 'detected_language', 'extracted_phrases',
+    )
+    INTERNED_FIELDS = frozenset((
+        'author', 'romanized_author', 'language', 'original_language', 'content_type',
+        'emotion_source', 'detected_language',
+    ))
+    __slots__ = FIELDS + ('_extra',)
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, book: Dict):
+        extra = None
+        for key, value in book.items():
+            if key in self._FIELD_SET:
+                if key in self.INTERNED_FIELDS:
+                    value = _intern(value)
+                elif type(value) is list:
+                    value = tuple(_intern(item) for item in value)
+                elif key == 'emotion' and type(value) is dict:
+                    value = {_intern(emotion): score for emotion, score in value.items()}
+                object.__setattr__(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[_intern(key)] = value
+        object.__setattr__(self, '_extra', extra)
+
+    @classmethod
+    def of(cls, book) -> 'BookRecord':
+        return book if isinstance(book, cls) else cls(book)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('BookRecord is read-only')
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"BookRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        """Plain dict copy, e.g. for JSON serialization"""
+        return {key: list(value) if type(value) is tuple else value for key, value in self.items()}
@@ -0,0 +1,149 @@
+"""
+Compare IndicBERT inference modes on the corpus: load time, memory, latency and
+emotion-score drift against fp32.
+
+    python compare_inference_modes.py [--modes fp32 int8-dynamic] [--store books.jsonl] [--json report.json]
+
+Books come from --store (an ingest.py store) or MOCK_BOOKS. Memory is the model's
+serialized weight size plus the growth of the process's resident set while loading.
+"""
+import io
+import gc
+import sys
+import json
+import time
+import argparse
+import contextlib
+import numpy as np
+
+from config import Config
+from mock_database import MOCK_BOOKS
+from ingest import read_store
+from nlp_engine import GathaNLPEngine, INFERENCE_MODES
+
+
+def _rss_mb():
+    """Resident set size of this process in MB (Linux only, None elsewhere)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _weights_mb(model):
+    import torch
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def _percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+
+def measure_mode(mode, texts, queries):
+    gc.collect()
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = GathaNLPEngine(inference_mode=mode)
+    load_seconds = time.perf_counter() - started
+    # Measure inference, not embedding cache hits left by an earlier run or mode
+    engine.embedding_cache = None
+    if engine.model_state != 'ready':
+        raise SystemExit(f'❌ {mode}: model did not load ({engine.model_error})')
+    rss_after = _rss_mb()
+
+    # Single-query latency as seen by a search request (one text per forward pass)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        engine.get_text_embeddings([query])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    embeddings = engine.get_text_embeddings([text[:512] for text in texts])
+    corpus_seconds = time.perf_counter() - started
+    scores = [engine.extract_emotion_scores(t, embedding=e) for t, e in zip(texts, embeddings)]
+
+    result = {
+        'mode': mode,
+        'load_seconds': round(load_seconds, 2),
+        'weights_mb': round(_weights_mb(engine.model), 2),
+        'rss_growth_mb': round(rss_after - rss_before, 1) if rss_before is not None else None,
+        'query_p50_ms': _percentile_ms(latencies, 50),
+        'query_p95_ms': _percentile_ms(latencies, 95),
+        'corpus_texts_per_second': round(len(texts) / corpus_seconds, 1),
+    }
+    del engine
+    gc.collect()
+    return result, embeddings, scores
+
+
+def drift(reference, other, emotions):
+    ref = np.array([[s[e] for e in emotions] for s in reference[1]])
+    cur = np.array([[s[e] for e in emotions] for s in other[1]])
+    a = reference[0] / np.linalg.norm(reference[0], axis=1, keepdims=True)
+    b = other[0] / np.linalg.norm(other[0], axis=1, keepdims=True)
+    return {
+        'emotion_max_abs_diff': round(float(np.abs(ref - cur).max()), 4),
+        'emotion_mean_abs_diff': round(float(np.abs(ref - cur).mean()), 5),
+        'top_emotion_agreement': round(float((ref.argmax(axis=1) == cur.argmax(axis=1)).mean()), 4),
+        'embedding_min_cosine': round(float((a * b).sum(axis=1).min()), 6),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare IndicBERT inference modes on the corpus')
+    parser.add_argument('--modes', nargs='+', default=list(INFERENCE_MODES), choices=INFERENCE_MODES)
+    parser.add_argument('--store', help='processed store written by ingest.py (default: MOCK_BOOKS)')
+    parser.add_argument('--limit', type=int, default=1000, help='at most this many books')
+    parser.add_argument('--queries', type=int, default=50, help='single-query latency samples')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    books = read_store(args.store) if args.store else iter(MOCK_BOOKS)
+    texts = [book['excerpt'] for _, book in zip(range(args.limit), books)]
+    words = ' '.join(texts).split()
+    queries = [' '.join(words[i:i + 3]) for i in range(0, 3 * args.queries, 3)] or ['प्रेम']
+
+    # Import torch/transformers up front so the first mode is not charged for it
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+
+    print(f"🧪 Comparing {', '.join(args.modes)} on {len(texts)} books ({Config.NLP_MODEL_NAME})")
+    outputs = {}
+    report = []
+    for mode in args.modes:
+        result, embeddings, scores = measure_mode(mode, texts, queries)
+        outputs[mode] = (embeddings, scores)
+        report.append(result)
+
+    baseline = args.modes[0]
+    for result in report:
+        if result['mode'] != baseline:
+            result[f'drift_vs_{baseline}'] = drift(outputs[baseline], outputs[result['mode']], Config.EMOTIONS)
+
+    columns = ['mode', 'load_seconds', 'weights_mb', 'rss_growth_mb',
+               'query_p50_ms', 'query_p95_ms', 'corpus_texts_per_second']
+    print('\n' + ' | '.join(f'{c:>14}' for c in columns))
+    for result in report:
+        print(' | '.join(f'{str(result[c]):>14}' for c in columns))
+    for result in report:
+        for key, value in result.items():
+            if key.startswith('drift_vs_'):
+                print(f"\n📉 {result['mode']} {key.replace('_', ' ')}: "
+                      + ', '.join(f'{k}={v}' for k, v in value.items()))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,10 +14,65 @@ class Config:
     # CORS Configuration
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173', 'http://localhost:5000']
     
-    # Cache settings
+    # Pagination: largest page /api/books and /api/search/advanced will return
+    MAX_PAGE_SIZE = 100
+    
+    # Processed books written by ingest.py; when set, the API serves this store
+    # instead of processing MOCK_BOOKS at startup
+    BOOKS_STORE_PATH = os.environ.get('GATHA_BOOKS_STORE') or None
+    
+    # Request size limits (MAX_CONTENT_LENGTH is enforced by Flask with a 413)
+    MAX_CONTENT_LENGTH = 2 * 1024 * 1024
+    NLP_ANALYZE_MAX_TEXTS = 256
+    NLP_ANALYZE_MAX_CHARS = 20000
+    
+    # Cache settings (per query cache: TTL in seconds, LRU size and memory cap)
     CACHE_TIMEOUT = 300
+    CACHE_MAX_ENTRIES = 2048
+    CACHE_MAX_BYTES = 32 * 1024 * 1024
     
     # NLP Model settings
     USE_LOCAL_MODELS = True  # Use transformers library locally
     EMBEDDING_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
     SIMILARITY_THRESHOLD = 0.3
+    NLP_MODEL_NAME = os.environ.get('GATHA_NLP_MODEL') or 'ai4bharat/indic-bert'
+    NLP_BATCH_SIZE = 32
+    # Bind the port immediately and load IndicBERT on a background thread
+    NLP_BACKGROUND_LOAD = os.environ.get('GATHA_NLP_BACKGROUND_LOAD', '1') == '1'
+    NLP_CACHE_DIR = os.environ.get('GATHA_NLP_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '.nlp_cache'
+    )
+    # CPU inference: 'fp32', or 'int8-dynamic' (dynamic int8 quantization of the linear
+    # layers: smaller and faster on CPU, small emotion-score drift, see
+    # compare_inference_modes.py). Thread counts of 0 keep torch's defaults.
+    NLP_INFERENCE_MODE = os.environ.get('GATHA_NLP_INFERENCE_MODE') or 'fp32'
+    NLP_INTRA_OP_THREADS = int(os.environ.get('GATHA_NLP_INTRA_OP_THREADS') or 0)
+    NLP_INTER_OP_THREADS = int(os.environ.get('GATHA_NLP_INTER_OP_THREADS') or 0)
+    # Long-document mode: embed whole texts as overlapping windows of NLP_WINDOW_TOKENS
+    # tokens (NLP_WINDOW_STRIDE apart), pooled by 'mean' or 'attention', instead of
+    # scoring only the first 512 characters
+    NLP_LONG_DOCUMENTS = os.environ.get('GATHA_NLP_LONG_DOCUMENTS', '0') == '1'
+    NLP_WINDOW_TOKENS = 512
+    NLP_WINDOW_STRIDE = 384
+    NLP_WINDOW_POOLING = os.environ.get('GATHA_NLP_WINDOW_POOLING') or 'mean'
+    # Single-text model calls from concurrent requests are collected for up to
+    # NLP_MICROBATCH_WINDOW_MS (or NLP_MICROBATCH_MAX_SIZE texts) into one forward pass
+    NLP_MICROBATCH = os.environ.get('GATHA_NLP_MICROBATCH', '1') == '1'
+    NLP_MICROBATCH_WINDOW_MS = 5
+    NLP_MICROBATCH_MAX_SIZE = 32
+    NLP_INFERENCE_TIMEOUT = 10.0  # seconds a request waits for its embedding
+    # Embedding cache: in-memory LRU of vectors, plus an on-disk tier under
+    # NLP_CACHE_DIR that survives restarts and is shared by workers (0 disables a tier)
+    EMBEDDING_CACHE_ENTRIES = 4096
+    EMBEDDING_CACHE_DISK_ROWS = int(os.environ.get('GATHA_EMBEDDING_CACHE_DISK_ROWS') or 200000)
+    
+    # Dense vector index over book embeddings (memory-mapped under NLP_CACHE_DIR):
+    # 'exact' scores every book, 'ivf' only the VECTOR_INDEX_IVF_PROBES closest of
+    # VECTOR_INDEX_IVF_LISTS k-means lists (0: about sqrt(number of books))
+    VECTOR_INDEX_MODE = os.environ.get('GATHA_VECTOR_INDEX_MODE') or 'exact'
+    VECTOR_INDEX_IVF_LISTS = 0
+    VECTOR_INDEX_IVF_PROBES = 8
+    # Build each published snapshot's vector index and related-books graph on a
+    # background thread (0: never built, e.g. for benchmarks of huge catalogues;
+    # related books are then empty and /api/search/similar answers 503)
+    BACKGROUND_INDEXES = os.environ.get('GATHA_BACKGROUND_INDEXES', '1') == '1'
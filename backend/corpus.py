@@ -0,0 +1,133 @@
+import json
+import hashlib
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from book_record import BookRecord
+
+
+def _json_default(value):
+    return value.to_dict() if isinstance(value, BookRecord) else str(value)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ProcessedCorpus:
+    """
+    Immutable snapshot of the processed books, published as a whole by book_processor.
+
+    Books are stored as compact BookRecords, with an id -> row index and an author ->
+    rows secondary index for constant-time lookups. Language filtering is served by
+    the catalogue index (search_index.CatalogueIndex).
+    Alongside the book records it keeps a (num_books, len(Config.EMOTIONS)) emotion
+    matrix, so threshold filters and per-emotion counts are array operations instead
+    of per-book dict lookups. It is float64 like the scores themselves, so a score
+    right at a threshold is classified exactly as the per-book comparison would.
+
+    Anything computed from the books (search indexes, collections, statistics) is
+    materialized through `derived`, once per snapshot. Publishing a new snapshot is
+    what invalidates it. Values too expensive to build on a request or at publish
+    (the related-books graph) are built in the background and added with
+    `add_derived`, which starts a new `revision` of the snapshot.
+    """
+
+    def __init__(self, books: List[Dict], version: int, previous: Optional['ProcessedCorpus'] = None):
+        books = [BookRecord.of(book) for book in books]
+        self.books = books
+        self.version = version
+        self.rows_by_id = {book['id']: row for row, book in enumerate(books)}
+        self.rows_by_author: Dict[str, List[int]] = {}
+        for row, book in enumerate(books):
+            self.rows_by_author.setdefault(book['author'], []).append(row)
+        # HTTP validators: versions restart with the process, so ETags also carry a
+        # digest of the content (and the revision), and Last-Modified is when this
+        # snapshot was published or last revised
+        self.digest = hashlib.sha256(
+            json.dumps(books, ensure_ascii=False, sort_keys=True, default=_json_default).encode('utf-8')
+        ).hexdigest()
+        self.published_at = _now()
+        self.modified_at = self.published_at
+        self.revision = 0
+        # Last-Modified has one-second resolution: if the previous snapshot was modified
+        # in the same second, a client's If-Modified-Since cannot tell them apart
+        self.last_modified_is_unique = previous is None or previous.modified_at < self.published_at
+        self.emotions = list(Config.EMOTIONS)
+        self.emotion_columns = {emotion: i for i, emotion in enumerate(self.emotions)}
+        self.emotion_matrix = np.array(
+            [[book['emotion'].get(emotion, 0.0) for emotion in self.emotions] for book in books],
+            dtype=np.float64
+        ).reshape(len(books), len(self.emotions))
+        self._derived = {}
+        self._derived_lock = threading.RLock()  # derived values may build on each other
+
+    def derived(self, name: str, build: Callable[['ProcessedCorpus'], object]):
+        """Value of `build(self)`, computed on first use and kept for this snapshot"""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = build(self)
+            return self._derived[name]
+
+    def peek(self, name: str):
+        """Derived value `name` if it has been materialized, else None"""
+        return self._derived.get(name)
+
+    def add_derived(self, values: Dict[str, object]):
+        """
+        Add derived values built off the request path and start a new revision, so the
+        ETag changes. The values are held back until a later second than the current
+        Last-Modified, which keeps If-Modified-Since able to tell the revisions apart.
+        """
+        wait = (self.modified_at + timedelta(seconds=1) - datetime.now(timezone.utc)).total_seconds()
+        if wait > 0:
+            time.sleep(wait)
+        with self._derived_lock:
+            for name, value in values.items():
+                self._derived.setdefault(name, value)
+            self.modified_at = _now()
+            self.revision += 1
+            self.last_modified_is_unique = True  # every earlier state is from an earlier second
+
+    def __len__(self):
+        return len(self.books)
+
+    def book(self, book_id) -> Optional[BookRecord]:
+        row = self.rows_by_id.get(book_id)
+        return None if row is None else self.books[row]
+
+    def books_by_ids(self, book_ids: Iterable) -> List[BookRecord]:
+        """Books with any of `book_ids`, in corpus order"""
+        rows = sorted({self.rows_by_id[book_id] for book_id in book_ids if book_id in self.rows_by_id})
+        return [self.books[row] for row in rows]
+
+    def books_by_author(self, author: str) -> List[BookRecord]:
+        return [self.books[row] for row in self.rows_by_author.get(author, ())]
+
+    def emotion_column(self, emotion: str):
+        """Scores of one emotion for every book, or None for an unknown emotion"""
+        column = self.emotion_columns.get(emotion.lower())
+        if column is None:
+            return None
+        return self.emotion_matrix[:, column]
+
+    def rows_with_emotion(self, emotion: str, threshold: float, inclusive: bool = False) -> np.ndarray:
+        """Rows (ascending) whose `emotion` score is above (or at, if inclusive) `threshold`"""
+        scores = self.emotion_column(emotion)
+        if scores is None:
+            return np.zeros(0, dtype=np.int64)
+        mask = scores >= threshold if inclusive else scores > threshold
+        return np.flatnonzero(mask)
+
+    def emotion_counts(self, threshold: float) -> Dict[str, int]:
+        """Number of books scoring above `threshold`, per emotion"""
+        counts = (self.emotion_matrix > threshold).sum(axis=0)
+        return {emotion: int(count) for emotion, count in zip(self.emotions, counts)}
@@ -0,0 +1,111 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+
+POOLING_MODES = ('mean', 'attention')
+
+# Softmax temperature of attention pooling over cosine similarities
+ATTENTION_TEMPERATURE = 0.1
+
+
+def text_pieces(text: str, piece_chars: int = 20000) -> Iterator[str]:
+    """`text` in consecutive pieces of about `piece_chars`, cut at whitespace where possible"""
+    start = 0
+    while start < len(text):
+        end = start + piece_chars
+        if end < len(text):
+            cut = max(text.rfind(' ', start, end), text.rfind('\n', start, end))
+            if cut > start:
+                end = cut
+        yield text[start:end]
+        start = end
+
+
+def special_tokens(tokenizer) -> Tuple[List[int], List[int]]:
+    """Token ids the tokenizer puts before and after a single sequence, e.g. ([CLS], [SEP])"""
+    probe = 'a'
+    plain = tokenizer(probe, add_special_tokens=False)['input_ids']
+    full = tokenizer(probe)['input_ids']
+    for start in range(len(full) - len(plain) + 1):
+        if full[start:start + len(plain)] == plain:
+            return full[:start], full[start + len(plain):]
+    return [], []
+
+
+def window_features(tokenizer, windows: List[List[int]]) -> List[Dict]:
+    """Model inputs for content-token windows, with the tokenizer's special tokens added"""
+    prefix, suffix = special_tokens(tokenizer)
+    features = []
+    for window in windows:
+        input_ids = prefix + window + suffix
+        features.append({'input_ids': input_ids, 'attention_mask': [1] * len(input_ids)})
+    return features
+
+
+def token_windows(tokenizer, text: str, window: int, stride: int,
+                  piece_chars: int = 20000) -> Iterator[List[int]]:
+    """
+    Overlapping windows of content token ids covering all of `text`.
+
+    The text is tokenized piece by piece and only the tokens not yet emitted are
+    buffered, so memory is O(window + piece_chars) however long the text is. Each
+    window leaves room for the tokenizer's special tokens; consecutive windows start
+    `stride` tokens apart.
+    """
+    prefix, suffix = special_tokens(tokenizer)
+    content = window - len(prefix) - len(suffix)
+    stride = max(1, min(stride, content))
+    buffer = []
+    covered = 0  # tokens at the start of `buffer` already in the previous window
+    emitted = False
+    for piece in text_pieces(text, piece_chars):
+        buffer.extend(tokenizer(piece, add_special_tokens=False)['input_ids'])
+        while len(buffer) >= content:
+            yield buffer[:content]
+            emitted = True
+            del buffer[:stride]
+            covered = content - stride
+    if len(buffer) > covered or not emitted:
+        yield buffer
+
+
+class WindowPooler:
+    """
+    Streaming pooling of window embeddings into one document vector in O(d) memory.
+
+    'mean' averages the windows. 'attention' weights each window by a softmax over
+    its strongest cosine similarity to the `queries` (the emotion prototypes), so the
+    most emotionally expressive passages dominate; it is computed as an online
+    softmax, rescaling the running sum whenever a new maximum score appears.
+    """
+
+    def __init__(self, pooling: str = 'mean', queries: Optional[np.ndarray] = None):
+        if pooling not in POOLING_MODES:
+            raise ValueError(f"Unknown pooling {pooling!r}, expected one of {POOLING_MODES}")
+        self.pooling = 'attention' if pooling == 'attention' and queries is not None else 'mean'
+        self.queries = queries
+        self._sum = None
+        self._weight = 0.0
+        self._max_score = -np.inf
+
+    def add(self, embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        if self._sum is None:
+            self._sum = np.zeros(embeddings.shape[1])
+        if self.pooling == 'mean':
+            self._sum += embeddings.sum(axis=0)
+            self._weight += len(embeddings)
+            return
+
+        unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        scores = (unit @ self.queries.T).max(axis=1) / ATTENTION_TEMPERATURE
+        new_max = max(self._max_score, float(scores.max()))
+        rescale = np.exp(self._max_score - new_max)
+        weights = np.exp(scores - new_max)
+        self._sum = self._sum * rescale + weights @ embeddings
+        self._weight = self._weight * rescale + float(weights.sum())
+        self._max_score = new_max
+
+    def result(self) -> Optional[np.ndarray]:
+        if self._sum is None or self._weight == 0:
+            return None
+        return (self._sum / self._weight).astype(np.float32)
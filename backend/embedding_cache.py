@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from typing import Dict, List, Optional
+
+from config import Config
+from query_cache import QueryCache
+
+# Advisory file locks let several server/ingest processes append to one disk tier
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DIGEST_BYTES = 16
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with whitespace runs collapsed, so trivially different strings share an entry"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk embedding tier for one model.
+
+    `vectors.f32` holds raw float32 rows and `keys.bin` the 16-byte digest of each
+    row, in the same order, so row i belongs to the i-th digest. Rows are read
+    through a memory map; new rows appended by other processes are picked up by
+    re-reading the tail of `keys.bin` on a miss. Appends hold an exclusive file lock
+    and write the vector before its key, so a visible key always has its vector. A
+    writer that dies between (or during) the two appends leaves a partial tail, which
+    the next writer truncates before appending so rows and keys stay aligned.
+    """
+
+    def __init__(self, directory: str, max_rows: int):
+        self.directory = directory
+        self.max_rows = max_rows
+        self.vectors_path = os.path.join(directory, 'vectors.f32')
+        self.keys_path = os.path.join(directory, 'keys.bin')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.dim = None
+        self._rows: Dict[bytes, int] = {}
+        self._keys_read = 0  # bytes of keys.bin already indexed
+        self._mapped = None
+        self._lock = threading.Lock()
+        self.full = False
+
+    def _load_meta(self) -> bool:
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.dim = json.load(f)['dim']
+        return self.dim is not None
+
+    def _reset(self):
+        self._rows = {}
+        self._keys_read = 0
+        self._mapped = None
+
+    def _refresh(self):
+        """Index digests appended since the last refresh (by any process)"""
+        if not os.path.exists(self.keys_path):
+            return
+        if os.path.getsize(self.keys_path) < self._keys_read:
+            self._reset()  # a partial tail was truncated by a writer
+        with open(self.keys_path, 'rb') as f:
+            f.seek(self._keys_read)
+            data = f.read()
+        usable = len(data) - len(data) % DIGEST_BYTES
+        first_row = self._keys_read // DIGEST_BYTES
+        for i in range(0, usable, DIGEST_BYTES):
+            self._rows[data[i:i + DIGEST_BYTES]] = first_row + i // DIGEST_BYTES
+        self._keys_read += usable
+
+    def _vector(self, row: int) -> Optional[np.ndarray]:
+        if self._mapped is None or row >= len(self._mapped):
+            self._mapped = np.memmap(self.vectors_path, dtype=np.float32, mode='r').reshape(-1, self.dim)
+            if row >= len(self._mapped):
+                return None  # key without a vector
+        return np.array(self._mapped[row])
+
+    def _repair(self, keys_file, vectors_file):
+        """Truncate both files to the rows that have a key and a complete vector (caller holds the lock)"""
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        keys_size = os.fstat(keys_file.fileno()).st_size
+        vectors_size = os.fstat(vectors_file.fileno()).st_size
+        rows = min(keys_size // DIGEST_BYTES, vectors_size // row_bytes)
+        if keys_size != rows * DIGEST_BYTES or vectors_size != rows * row_bytes:
+            print(f"⚠️ Embedding disk cache has a partial write, truncating to {rows} rows")
+            keys_file.truncate(rows * DIGEST_BYTES)
+            vectors_file.truncate(rows * row_bytes)
+            self._reset()
+
+    def get(self, digest: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(digest)
+            if row is None:
+                if not self._load_meta():
+                    return None
+                self._refresh()
+                row = self._rows.get(digest)
+                if row is None:
+                    return None
+            return self._vector(row)
+
+    def put_many(self, digests: List[bytes], vectors: np.ndarray):
+        if self.full or not digests:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.keys_path, 'ab') as keys_file, open(self.vectors_path, 'ab') as vectors_file:
+                if fcntl is not None:
+                    fcntl.flock(keys_file, fcntl.LOCK_EX)
+                try:
+                    if not self._load_meta():
+                        self.dim = vectors.shape[1]
+                        with open(self.meta_path, 'w', encoding='utf-8') as f:
+                            json.dump({'dim': self.dim}, f)
+                    self._repair(keys_file, vectors_file)
+                    self._refresh()
+                    # Another process may have stored some of these meanwhile
+                    new = [i for i, digest in enumerate(digests) if digest not in self._rows]
+                    new = list({digests[i]: i for i in new}.values())
+                    room = self.max_rows - len(self._rows)
+                    if room <= 0:
+                        self.full = True
+                        print(f"⚠️ Embedding disk cache is full ({self.max_rows} rows), not adding more")
+                        return
+                    new = new[:room]
+                    first_row = self._keys_read // DIGEST_BYTES
+                    vectors_file.write(vectors[new].tobytes())
+                    vectors_file.flush()
+                    keys_file.write(b''.join(digests[i] for i in new))
+                    keys_file.flush()
+                    for offset, i in enumerate(new):
+                        self._rows[digests[i]] = first_row + offset
+                    self._keys_read += len(new) * DIGEST_BYTES
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings, keyed by a hash of (model key, variant,
+    normalized text). `variant` identifies how the text was embedded, e.g. its
+    max_length or long-document window settings.
+
+    Tier one is a bounded in-memory LRU (a QueryCache). Tier two is a
+    DiskEmbeddingStore under NLP_CACHE_DIR, which survives restarts and is shared by
+    every process using the same model. Disk hits are promoted to memory.
+    """
+
+    def __init__(self, model_key: str, memory_entries: int = None, disk_rows: int = None,
+                 directory: str = None):
+        self.model_key = model_key
+        memory_entries = Config.EMBEDDING_CACHE_ENTRIES if memory_entries is None else memory_entries
+        disk_rows = Config.EMBEDDING_CACHE_DISK_ROWS if disk_rows is None else disk_rows
+        # Embeddings never go stale for a model; the TTL only recycles idle entries
+        self.memory = QueryCache('embeddings', ttl=24 * 3600, max_entries=memory_entries) if memory_entries else None
+        self.disk = None
+        if disk_rows:
+            model_dir = hashlib.sha256(model_key.encode('utf-8')).hexdigest()[:16]
+            directory = directory or os.path.join(Config.NLP_CACHE_DIR, 'embeddings', model_dir)
+            self.disk = DiskEmbeddingStore(directory, disk_rows)
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    def digest(self, text: str, variant) -> bytes:
+        payload = f"{self.model_key}\x00{variant}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).digest()[:DIGEST_BYTES]
+
+    def get_many(self, texts: List[str], variant) -> List[Optional[np.ndarray]]:
+        results = []
+        for text in texts:
+            digest = self.digest(text, variant)
+            vector = self.memory.get(digest) if self.memory else None
+            if vector is None and self.disk is not None:
+                try:
+                    vector = self.disk.get(digest)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Embedding disk cache read failed: {e}")
+                    vector = None
+                if vector is None:
+                    self.disk_misses += 1
+                else:
+                    self.disk_hits += 1
+                    if self.memory:
+                        self.memory.set(digest, vector)
+            results.append(vector)
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray, variant):
+        digests = [self.digest(text, variant) for text in texts]
+        if self.memory:
+            for digest, vector in zip(digests, vectors):
+                self.memory.set(digest, np.array(vector, dtype=np.float32))
+        if self.disk is not None:
+            try:
+                self.disk.put_many(digests, vectors)
+            except OSError as e:
+                print(f"⚠️ Embedding disk cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        disk_lookups = self.disk_hits + self.disk_misses
+        return {
+            'memory': self.memory.stats() if self.memory else None,
+            'disk': {
+                'entries': len(self.disk),
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'hit_rate': round(self.disk_hits / disk_lookups, 4) if disk_lookups else 0.0,
+                'full': self.disk.full
+            } if self.disk is not None else None
+        }
@@ -0,0 +1,50 @@
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+
+def corpus_etag(corpus) -> str:
+    """Strong validator for a GET response: corpus version, revision and digest plus the request's args"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    request_key = hashlib.sha256(f'{request.path}?{args}'.encode('utf-8')).hexdigest()[:12]
+    return f'{corpus.version}.{corpus.revision}-{corpus.digest[:12]}-{request_key}'
+
+
+def _not_modified(etag, corpus) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # A second-resolution date cannot validate a snapshot published in the same
+    # second as its predecessor was modified; those are only answered with 304 by ETag
+    if request.if_modified_since and corpus.last_modified_is_unique:
+        return corpus.modified_at <= request.if_modified_since
+    return False
+
+
+def conditional_on_corpus(get_corpus):
+    """
+    Decorator for catalogue GET endpoints whose response only changes with the corpus.
+
+    Adds ETag and Last-Modified headers, and answers If-None-Match/If-Modified-Since
+    with 304 before the view runs, so no filtering or serialization happens.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            corpus = get_corpus()
+            etag = corpus_etag(corpus)
+
+            if _not_modified(etag, corpus):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = corpus.modified_at
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching for single-text model calls from concurrent requests.
+
+    Callers `submit` a text and get a Future. A dispatcher thread waits for the first
+    pending text, keeps collecting for up to `max_wait_ms` (or until `max_batch_size`
+    texts are pending), and runs them through `run_batch` as one forward pass instead
+    of one pass per request competing for the same CPU threads. Identical texts in a
+    batch are embedded once. Futures cancelled before their batch starts are skipped.
+    """
+
+    def __init__(self, run_batch: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0, name: str = 'inference-scheduler'):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._pending = deque()  # (text, future)
+        self._condition = threading.Condition()
+        self._thread = None
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_forever, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.append((text, future))
+            self._condition.notify()
+        return future
+
+    def run(self, text: str, timeout: Optional[float] = None):
+        """Result for one text, waiting at most `timeout` seconds (TimeoutError after that)"""
+        future = self.submit(text)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stats(self):
+        with self._condition:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'pending': len(self._pending)
+            }
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            # Give concurrent callers a short window to join this batch
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            count = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _dispatch_forever(self):
+        while True:
+            batch = [(text, future) for text, future in self._next_batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                results = self.run_batch(texts)
+                if results is None:
+                    raise RuntimeError('model is not available')
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            row_of = {text: row for row, text in enumerate(texts)}
+            for text, future in batch:
+                future.set_result(results[row_of[text]])
+            with self._condition:
+                self.batches += 1
+                self.requests += len(batch)
@@ -0,0 +1,436 @@
+"""
+Streaming bulk ingestion: books from JSONL/CSV files -> NLP pipeline -> processed store.
+
+    python ingest.py catalogue.jsonl more_books.csv --store data/processed_books.jsonl
+
+Records are read lazily, validated, and processed in chunks of --chunk-size books.
+A reader thread keeps at most --prefetch chunks ready ahead of the NLP stage, so
+memory stays bounded no matter how large the input is. Every processed chunk is
+appended to the store (one JSON record per line) and then a checkpoint is written
+atomically, so an interrupted run resumes after the last completed chunk.
+Rejected records go to `<store>.rejected.jsonl` with the reason.
+
+With --workers N the NLP stage runs on N processes, each loading the model once;
+reprocess an existing store after a lexicon change by ingesting it again:
+
+    python ingest.py data/processed_books.jsonl --store data/reprocessed.jsonl --workers 8 --quiet
+
+Point Config.BOOKS_STORE_PATH (GATHA_BOOKS_STORE) at the store to serve it.
+"""
+import io
+import os
+import csv
+import sys
+import json
+import time
+import queue
+import argparse
+import itertools
+import threading
+import contextlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import Config
+from mock_database import VALID_CONTENT_TYPES
+from nlp_engine import GathaNLPEngine
+
+REQUIRED_FIELDS = ('id', 'title', 'author', 'language', 'content_type', 'excerpt')
+LIST_FIELDS = ('keywords', 'characters', 'themes')
+# Filled in by the NLP pipeline, never taken from the input
+NLP_FIELDS = ('emotion', 'emotion_source', 'detected_language', 'extracted_phrases')
+
+
+class InvalidBook(ValueError):
+    pass
+
+
+def read_records(path: str, skip: int = 0) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    (record number, record, error) for every book in a .jsonl or .csv file, one at a
+    time. Record numbers count from 1; the first `skip` records are passed over
+    without being parsed. Unparseable records come back with an error instead.
+    """
+    if path.lower().endswith('.csv'):
+        csv.field_size_limit(2 ** 31 - 1)
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for number, row in enumerate(csv.DictReader(f), 1):
+                if number > skip:
+                    yield number, row, None
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            if number <= skip:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f'invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield number, None, 'record is not a JSON object'
+                continue
+            yield number, record, None
+
+
+def _as_list(value) -> List:
+    """List fields may be JSON lists, or strings holding a JSON list or '|'-separated items"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        if value.lstrip().startswith('['):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise InvalidBook(f'malformed list: {value[:40]}')
+            if isinstance(value, list):
+                return value
+        else:
+            return [item.strip() for item in value.split('|') if item.strip()]
+    raise InvalidBook(f'expected a list, got {type(value).__name__}')
+
+
+def validate_book(record: Dict) -> Dict:
+    """Normalized catalogue record in the shape of MOCK_BOOKS, or raise InvalidBook"""
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise InvalidBook(f'missing {", ".join(missing)}')
+
+    try:
+        book_id = int(record['id'])
+    except (TypeError, ValueError):
+        raise InvalidBook(f'id is not an integer: {record["id"]!r}')
+
+    content_type = str(record['content_type']).strip().lower()
+    valid_types = {ct.lower(): ct for ct in VALID_CONTENT_TYPES}
+    if content_type not in valid_types:
+        raise InvalidBook(f'invalid content type {record["content_type"]!r}')
+
+    year = record.get('year')
+    if year in (None, ''):
+        year = None
+    else:
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            raise InvalidBook(f'year is not an integer: {year!r}')
+
+    book = {key: value for key, value in record.items() if key not in NLP_FIELDS}
+    book.update({
+        'id': book_id,
+        'title': str(record['title']).strip(),
+        'romanized_title': str(record.get('romanized_title') or '').strip(),
+        'author': str(record['author']).strip(),
+        'romanized_author': str(record.get('romanized_author') or '').strip(),
+        'cover_image': record.get('cover_image') or '',
+        'language': str(record['language']).strip(),
+        'original_language': str(record.get('original_language') or record['language']).strip(),
+        'content_type': valid_types[content_type],
+        'year': year,
+        'excerpt': str(record['excerpt']),
+    })
+    for field in LIST_FIELDS:
+        book[field] = [str(item) for item in _as_list(record.get(field))]
+    return book
+
+
+def prefetch(items: Iterable, max_pending: int) -> Iterator:
+    """
+    Iterate `items` on a reader thread, at most `max_pending` items ahead of the
+    consumer. The bounded queue is the backpressure: the reader blocks while the
+    consumer is busy. Exceptions from the reader are re-raised in the consumer.
+    """
+    pending = queue.Queue(maxsize=max(1, max_pending))
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        pending.put(item, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            pending.put(done)
+        except BaseException as e:
+            pending.put(e)
+
+    reader = threading.Thread(target=produce, name='ingest-reader', daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ProcessedStore:
+    """
+    Append-only JSONL file of processed books. The checkpoint next to it records how
+    many bytes of the store are complete and how far each source file was read; it
+    is replaced atomically after every chunk, so readers and resumed runs ignore
+    anything written after it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoint_path = f'{path}.checkpoint.json'
+        self.rejected_path = f'{path}.rejected.jsonl'
+
+    def load_checkpoint(self) -> Optional[Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, checkpoint: Dict):
+        tmp_path = f'{self.checkpoint_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset(self):
+        for path in (self.path, self.checkpoint_path, self.rejected_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def open(self, checkpoint: Dict):
+        """Open for appending, dropping anything written after `checkpoint`"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._books = open(self.path, 'ab')
+        self._books.truncate(checkpoint['store_bytes'])
+        self._books.seek(0, os.SEEK_END)
+        self._rejected = open(self.rejected_path, 'ab')
+        self._rejected.truncate(checkpoint['rejected_bytes'])
+        self._rejected.seek(0, os.SEEK_END)
+        self._checkpoint = checkpoint
+
+    def close(self):
+        self._books.close()
+        self._rejected.close()
+
+    def append(self, books: List[Dict], rejected: List[Dict], positions: Dict[str, int]):
+        """Durably append one chunk, then advance the checkpoint past it"""
+        for handle, records in ((self._books, books), (self._rejected, rejected)):
+            handle.write(b''.join(
+                (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8') for record in records
+            ))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        checkpoint = self._checkpoint
+        checkpoint['sources'].update(positions)
+        checkpoint['books'] += len(books)
+        checkpoint['rejected'] += len(rejected)
+        checkpoint['store_bytes'] = self._books.tell()
+        checkpoint['rejected_bytes'] = self._rejected.tell()
+        checkpoint['updated_at'] = datetime.now().isoformat()
+        self._save_checkpoint(checkpoint)
+
+
+def read_store(path: str) -> Iterator[Dict]:
+    """Processed books from a store, up to its last checkpoint (if it has one)"""
+    checkpoint = ProcessedStore(path).load_checkpoint()
+    limit = checkpoint['store_bytes'] if checkpoint else None
+    with open(path, 'rb') as f:
+        position = 0
+        for line in f:
+            position += len(line)
+            if limit is not None and position > limit:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+
+def _work_items(sources: List[str], checkpoint: Dict, seen_ids: set):
+    """(source, record number, book or None, error) for every record past the checkpoint"""
+    for source in sources:
+        key = os.path.abspath(source)
+        for number, record, error in read_records(source, skip=checkpoint['sources'].get(key, 0)):
+            book = None
+            if error is None:
+                try:
+                    book = validate_book(record)
+                    if book['id'] in seen_ids:
+                        raise InvalidBook(f'duplicate id {book["id"]}')
+                    seen_ids.add(book['id'])
+                except InvalidBook as e:
+                    book, error = None, str(e)
+            yield key, number, book, error
+
+
+# Per-process state of pool workers, set up once by _init_worker
+_worker_engine = None
+
+
+def _init_worker(threads: int, quiet: bool):
+    """Pool initializer: load one engine (and model) per worker, limited to its share of cores"""
+    global _worker_engine
+    # Set before torch is imported by the model loader, so intra-op pools are sized right
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        _worker_engine = GathaNLPEngine()
+    if _worker_engine.model_state == 'ready':
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _worker_pipeline() -> Tuple[bool, str]:
+    return _worker_engine.model_state == 'ready', _worker_engine.pipeline_fingerprint()
+
+
+def _analyze_in_worker(texts: List[str], use_model: bool) -> List[Dict]:
+    if use_model and _worker_engine.model_state != 'ready':
+        raise RuntimeError(f'IndicBERT failed to load in worker {os.getpid()}: {_worker_engine.model_error}')
+    return _worker_engine.analyze_texts(texts, use_model=use_model)
+
+
+def ingest(sources: List[str], store_path: str, chunk_size: int = 256, prefetch_chunks: int = 4,
+           restart: bool = False, engine=None, workers: int = 1, quiet: bool = False) -> Dict:
+    """
+    Run the ingestion pipeline, returning the final checkpoint.
+
+    With workers > 1 the NLP stage runs in a process pool: every worker loads its own
+    engine once and gets cpu_count // workers torch threads. Chunks are submitted in
+    order and their results collected in the same order, so the store is identical
+    to a single-process run.
+    """
+    log = (lambda *args, **kwargs: None) if quiet else print
+    store = ProcessedStore(store_path)
+    if restart:
+        store.reset()
+
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(threads, quiet)
+            ))
+            use_model, fingerprint = pool.submit(_worker_pipeline).result()
+
+            def submit(texts):
+                return pool.submit(_analyze_in_worker, texts, use_model)
+        else:
+            if engine is None:
+                with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                    engine = GathaNLPEngine()
+            use_model = engine.model_state == 'ready'
+            fingerprint = engine.pipeline_fingerprint(use_model=use_model)
+
+            def submit(texts):
+                future = Future()
+                future.set_result(engine.analyze_texts(texts, use_model=use_model))
+                return future
+
+        checkpoint = store.load_checkpoint()
+        if checkpoint is None:
+            store.reset()
+            checkpoint = {'fingerprint': fingerprint, 'sources': {}, 'books': 0, 'rejected': 0,
+                          'store_bytes': 0, 'rejected_bytes': 0}
+        elif checkpoint['fingerprint'] != fingerprint:
+            raise SystemExit(
+                f'❌ {store_path} was written by a different NLP pipeline '
+                f'({checkpoint["fingerprint"]} != {fingerprint}); rerun with --restart'
+            )
+        else:
+            log(f"🔁 Resuming: {checkpoint['books']:,} books already in {store_path}")
+
+        # Ids already in the store, to reject duplicates across runs
+        seen_ids = {book['id'] for book in read_store(store_path)} if checkpoint['books'] else set()
+
+        log(f"🚀 Ingesting {len(sources)} file(s) with {'IndicBERT + keywords' if use_model else 'keywords only'}"
+            f" on {workers} worker(s)")
+        started = time.perf_counter()
+        books_done = rejected_done = 0
+        in_flight = deque()
+        store.open(checkpoint)
+        try:
+            chunks = prefetch(chunked(_work_items(sources, checkpoint, seen_ids), chunk_size), prefetch_chunks)
+            for chunk in itertools.chain(chunks, [None]):
+                if chunk is not None:
+                    books = [book for _, _, book, _ in chunk if book is not None]
+                    in_flight.append((chunk, books, submit([book['excerpt'] for book in books])))
+                # Keep every worker busy, but merge results strictly in input order
+                while in_flight and (chunk is None or len(in_flight) > 2 * (workers - 1)):
+                    done_chunk, books, future = in_flight.popleft()
+                    for book, result in zip(books, future.result()):
+                        book.update(result)
+                    rejected = [
+                        {'source': source, 'record': number, 'error': error}
+                        for source, number, book, error in done_chunk if book is None
+                    ]
+                    positions = {source: number for source, number, _, _ in done_chunk}
+                    store.append(books, rejected, positions)
+
+                    books_done += len(books)
+                    rejected_done += len(rejected)
+                    elapsed = time.perf_counter() - started
+                    log(f"📦 {checkpoint['books']:,} books stored, {checkpoint['rejected']:,} rejected "
+                        f"({books_done / elapsed:,.1f} books/s)")
+        finally:
+            store.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Ingested {books_done:,} books ({rejected_done:,} rejected) in {elapsed:.1f}s "
+          f"({books_done / max(elapsed, 1e-9):,.1f} books/s, {workers} worker(s)) into {store_path}")
+    if rejected_done:
+        print(f"   Rejected records: {store.rejected_path}")
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest books from JSONL/CSV files into a processed store')
+    parser.add_argument('sources', nargs='+', help='.jsonl or .csv files of books')
+    parser.add_argument('--store', default=Config.BOOKS_STORE_PATH, required=Config.BOOKS_STORE_PATH is None,
+                        help='processed store to write (default: Config.BOOKS_STORE_PATH)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='books per NLP chunk and checkpoint')
+    parser.add_argument('--prefetch', type=int, default=4, help='chunks read ahead of the NLP stage')
+    parser.add_argument('--restart', action='store_true', help='discard the store and checkpoint first')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='NLP worker processes, each with its own model (default: 1)')
+    parser.add_argument('--quiet', action='store_true', help='only print the final summary')
+    args = parser.parse_args(argv)
+
+    missing = [source for source in args.sources if not os.path.exists(source)]
+    if missing:
+        parser.error(f'no such file: {", ".join(missing)}')
+    ingest(args.sources, args.store, args.chunk_size, args.prefetch, args.restart,
+           workers=max(1, args.workers), quiet=args.quiet)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
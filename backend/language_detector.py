@@ -0,0 +1,125 @@
+import re
+import numpy as np
+from typing import List, Sequence
+
+# Only the start of a text is examined; a few hundred letters settle the script
+SAMPLE_CHARS = 1000
+DEFAULT_LANGUAGE = 'Hindi'
+
+# (first codepoint, last codepoint, script). The Devanagari dandas (U+0964/5) are
+# left out because Bengali and other scripts punctuate with them too.
+SCRIPT_RANGES = (
+    (0x0041, 0x005A, 'Latin'),
+    (0x0061, 0x007A, 'Latin'),
+    (0x00C0, 0x024F, 'Latin'),
+    (0x0600, 0x06FF, 'Arabic'),
+    (0x0750, 0x077F, 'Arabic'),
+    (0x0900, 0x0963, 'Devanagari'),
+    (0x0966, 0x097F, 'Devanagari'),
+    (0x0980, 0x09FF, 'Bengali'),
+    (0x0A00, 0x0A7F, 'Gurmukhi'),
+    (0x0A80, 0x0AFF, 'Gujarati'),
+    (0x0B00, 0x0B7F, 'Odia'),
+    (0x0B80, 0x0BFF, 'Tamil'),
+    (0x0C00, 0x0C7F, 'Telugu'),
+    (0x0C80, 0x0CFF, 'Kannada'),
+    (0x0D00, 0x0D7F, 'Malayalam'),
+)
+
+# Scripts used by a single language here; Devanagari is split by _devanagari_language
+SCRIPT_LANGUAGES = {
+    'Latin': 'English',
+    'Arabic': 'Urdu',
+    'Bengali': 'Bengali',
+    'Gurmukhi': 'Punjabi',
+    'Gujarati': 'Gujarati',
+    'Odia': 'Odia',
+    'Tamil': 'Tamil',
+    'Telugu': 'Telugu',
+    'Kannada': 'Kannada',
+    'Malayalam': 'Malayalam',
+}
+
+SCRIPTS = tuple(dict.fromkeys(script for _, _, script in SCRIPT_RANGES))
+
+# Histogram buckets: 0 is "anything else", then one per script, then ळ (U+0933)
+# on its own since it is common in Marathi and rare in Hindi. Codepoints map to
+# buckets through one lookup table, so a text is bucketed in a single vectorized pass.
+_OTHER = 0
+_LLA = len(SCRIPTS) + 1
+_DEVANAGARI = SCRIPTS.index('Devanagari') + 1
+N_BUCKETS = len(SCRIPTS) + 2
+_BUCKET_OF = np.zeros(max(end for _, end, _ in SCRIPT_RANGES) + 2, dtype=np.int64)
+for _start, _end, _script in SCRIPT_RANGES:
+    _BUCKET_OF[_start:_end + 1] = SCRIPTS.index(_script) + 1
+_BUCKET_OF[0x0933] = _LLA
+
+# Function words and inflections that tell Hindi and Marathi apart. Words shared
+# by both (तो, जो, तू, ही ...) are deliberately left out.
+HINDI_WORDS = frozenset(
+    'है हैं और का की के में से नहीं था थी थे यह वह ये वे को पर भी ने गया गई किया रहा रही मैं हम उसके उसकी लेकिन'.split()
+)
+MARATHI_WORDS = frozenset(
+    'आहे आहेत आहेस आणि नाही पण होते होता होती त्या त्याला त्याचा त्याची त्याने मी आम्ही तुम्ही म्हणून मध्ये झाला झाले केले केला काय असे असा कधीच'.split()
+)
+# Postpositions Marathi writes fused to the noun ("फळाची", "समाजाच्या")
+MARATHI_SUFFIXES = ('च्या', 'ाचा', 'ाची', 'ाचे', 'ल्या', 'ांना', 'मुळे')
+_DEVANAGARI_WORD = re.compile(r'[ऀ-ॣ०-ॿ]+')
+
+
+def script_histograms(texts: Sequence[str], sample_chars: int = SAMPLE_CHARS) -> np.ndarray:
+    """
+    (N, N_BUCKETS) counts of the characters of each text (its first `sample_chars`)
+    per script bucket, computed for the whole batch with one bincount.
+    """
+    samples = [text[:sample_chars] for text in texts]
+    if not samples:
+        return np.zeros((0, N_BUCKETS), dtype=np.int64)
+    codepoints = np.frombuffer(''.join(samples).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    lengths = np.fromiter(map(len, samples), dtype=np.int64, count=len(samples))
+    rows = np.repeat(np.arange(len(samples)), lengths)
+    buckets = _BUCKET_OF[np.minimum(codepoints, len(_BUCKET_OF) - 1)]
+    counts = np.bincount(rows * N_BUCKETS + buckets, minlength=len(samples) * N_BUCKETS)
+    return counts.reshape(len(samples), N_BUCKETS)
+
+
+def _devanagari_language(sample: str, lla_count: int) -> str:
+    hindi, marathi = 0, lla_count
+    for word in _DEVANAGARI_WORD.findall(sample):
+        if word in HINDI_WORDS:
+            hindi += 1
+        elif word in MARATHI_WORDS or word.endswith(MARATHI_SUFFIXES):
+            marathi += 1
+    return 'Marathi' if marathi > hindi else 'Hindi'
+
+
+def detect_languages(texts: Sequence[str], default: str = DEFAULT_LANGUAGE,
+                     sample_chars: int = SAMPLE_CHARS) -> List[str]:
+    """
+    Language of each text from its dominant script; Devanagari texts are told apart
+    as Hindi or Marathi by function words, fused postpositions and ळ. Texts without
+    any letters of a known script get `default`.
+    """
+    histograms = script_histograms(texts, sample_chars)
+    if not len(histograms):
+        return []
+    scripts = histograms[:, 1:_LLA].copy()
+    scripts[:, _DEVANAGARI - 1] += histograms[:, _LLA]
+    dominant = scripts.argmax(axis=1)
+    found = scripts.max(axis=1) > 0
+
+    languages = []
+    for i, text in enumerate(texts):
+        if not found[i]:
+            languages.append(default)
+            continue
+        script = SCRIPTS[dominant[i]]
+        if script == 'Devanagari':
+            languages.append(_devanagari_language(text[:sample_chars], int(histograms[i, _LLA])))
+        else:
+            languages.append(SCRIPT_LANGUAGES[script])
+    return languages
+
+
+def detect_language(text: str, default: str = DEFAULT_LANGUAGE) -> str:
+    return detect_languages([text], default)[0]
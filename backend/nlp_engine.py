@@ -1,20 +1,48 @@
 import re
+import os
+import json
+import time
+import hashlib
+import importlib.util
+import threading
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import TimeoutError
 import numpy as np
 from typing import List, Dict, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
+from config import Config
+from text_matcher import EmotionLexiconMatcher
+from semantic_index import SemanticIndex
+from inference_scheduler import InferenceScheduler
+from embedding_cache import EmbeddingCache
+from language_detector import detect_language, detect_languages
+from document_embedding import WindowPooler, special_tokens, token_windows, window_features
+
 # PRE-TRAINED MODEL IMPORTS
-try:
+# torch/transformers take seconds to import, so they are only imported by the
+# model loader (which may run on a background thread), see _import_model_libraries
+TRANSFORMERS_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None for name in ('torch', 'transformers')
+)
+if not TRANSFORMERS_AVAILABLE:
+    print("⚠️ transformers not installed. Install with: pip install transformers torch")
+torch = None
+AutoTokenizer = None
+AutoModel = None
+
+
+def _import_model_libraries():
+    global torch, AutoTokenizer, AutoModel
     import torch
     from transformers import AutoTokenizer, AutoModel
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
-    print("⚠️ transformers not installed. Install with: pip install transformers torch")
+
+INFERENCE_MODES = ('fp32', 'int8-dynamic')
+
+# Bump whenever scoring, language detection or phrase extraction logic changes,
+# so on-disk caches of processed results are invalidated
+NLP_ENGINE_VERSION = '3'
 
 
 class GathaNLPEngine:
@@ -24,44 +52,53 @@ class GathaNLPEngine:
     ✅ Multi-strategy emotion detection with context awareness (SECONDARY)
     """
 
-    def __init__(self):
+    def __init__(self, model_name: str = None, background_load: bool = False, inference_mode: str = None):
         print("="*60)
         print("🚀 Initializing Advanced NLP Engine with Pre-trained Model")
         print("="*60)
         
-        # Load PRE-TRAINED MODEL for Indian Languages
-        self.model = None
-        self.tokenizer = None
-        
-        if TRANSFORMERS_AVAILABLE:
-            try:
-                print("📥 Loading IndicBERT (ai4bharat/indic-bert)...")
-                print("   (First time will download ~500MB model)")
-                self.tokenizer = AutoTokenizer.from_pretrained("ai4bharat/indic-bert")
-                self.model = AutoModel.from_pretrained("ai4bharat/indic-bert")
-                self.model.eval()  # Set to evaluation mode
-                print("✅ IndicBERT loaded successfully!")
-                print("   Model: ai4bharat/indic-bert (12 Indian languages)")
-            except Exception as e:
-                print(f"⚠️ Could not load IndicBERT: {e}")
-                print("   Falling back to keyword-based NLP")
-        else:
-            print("⚠️ transformers library not installed")
-            print("   Install with: pip install transformers torch")
-        
         # Load keyword dictionaries
         print("📚 Loading emotion lexicons...")
         self.stop_words = self._load_stop_words()
-        self.vectorizer = TfidfVectorizer(
-            lowercase=False,
-            stop_words=None,
-            max_features=1000,
-            ngram_range=(1, 3)
-        )
         self.emotion_keywords = self._load_emotion_keywords()
         self.emotion_word_roots = self._load_emotion_word_roots()
         self.contextual_boosters = self._load_contextual_boosters()
-        self.language_indicators = self._load_language_indicators()
+        self.lexicon_hash = self._compute_lexicon_hash()
+        self.lexicon_matcher = EmotionLexiconMatcher(
+            self.emotion_keywords, self.emotion_word_roots, self.contextual_boosters
+        )
+        self._semantic_index = None  # (texts, len(texts), SemanticIndex) of the last semantic_search
+        
+        # PRE-TRAINED MODEL for Indian Languages. Tokenizer, model and emotion
+        # prototypes are published together as one tuple, so readers never see
+        # a half-loaded model while it is swapped in from the loader thread.
+        self.model_name = model_name or Config.NLP_MODEL_NAME
+        self.inference_mode = inference_mode or Config.NLP_INFERENCE_MODE
+        if self.inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode {self.inference_mode!r}, expected one of {INFERENCE_MODES}")
+        self.embedding_cache = None
+        if Config.EMBEDDING_CACHE_ENTRIES or Config.EMBEDDING_CACHE_DISK_ROWS:
+            self.embedding_cache = EmbeddingCache(self.embedding_fingerprint())
+        self._model_bundle = (None, None, None)
+        self._ready_callbacks = []
+        self._state_lock = threading.Lock()
+        self.model_state = 'loading'
+        self.model_error = None
+        self.model_load_seconds = None
+        self.warmup_latency_ms = None
+        self.inference_scheduler = None
+        if Config.NLP_MICROBATCH:
+            self.inference_scheduler = InferenceScheduler(
+                self._embed_with_current_model,
+                max_batch_size=Config.NLP_MICROBATCH_MAX_SIZE,
+                max_wait_ms=Config.NLP_MICROBATCH_WINDOW_MS
+            )
+        
+        if background_load:
+            print("⏳ IndicBERT will load in the background; keyword scoring until it is ready")
+            threading.Thread(target=self._load_model, name='indicbert-loader', daemon=True).start()
+        else:
+            self._load_model()
         
         print("✅ NLP Engine is ready!")
         if self.model is not None:
@@ -70,6 +107,105 @@ class GathaNLPEngine:
             print("🎯 Using keyword-based approach")
         print("="*60 + "\n")
 
+    @property
+    def tokenizer(self):
+        return self._model_bundle[0]
+
+    @property
+    def model(self):
+        return self._model_bundle[1]
+
+    @property
+    def emotion_prototypes(self):
+        return self._model_bundle[2]
+
+    def _configure_threads(self):
+        """Apply Config thread counts; inter-op threads can only be set before torch starts them"""
+        if Config.NLP_INTRA_OP_THREADS > 0:
+            torch.set_num_threads(Config.NLP_INTRA_OP_THREADS)
+        if Config.NLP_INTER_OP_THREADS > 0:
+            try:
+                torch.set_num_interop_threads(Config.NLP_INTER_OP_THREADS)
+            except RuntimeError as e:
+                print(f"⚠️ Could not set inter-op threads: {e}")
+
+    def model_status(self) -> Dict:
+        """Model readiness for health checks: state is loading, ready or failed"""
+        return {
+            'state': self.model_state,
+            'model_name': self.model_name,
+            'inference_mode': self.inference_mode,
+            'load_seconds': self.model_load_seconds,
+            'warmup_latency_ms': self.warmup_latency_ms,
+            'error': self.model_error,
+            'microbatching': self.inference_scheduler.stats() if self.inference_scheduler else None,
+            'embedding_cache': self.embedding_cache.stats() if self.embedding_cache else None
+        }
+
+    def on_model_ready(self, callback):
+        """Call `callback(engine)` once the model is ready (immediately if it already is)"""
+        with self._state_lock:
+            if self.model_state != 'ready':
+                self._ready_callbacks.append(callback)
+                return
+        callback(self)
+
+    def _load_model(self):
+        if not TRANSFORMERS_AVAILABLE:
+            print("⚠️ transformers library not installed")
+            print("   Install with: pip install transformers torch")
+            self.model_error = 'transformers not installed'
+            self.model_state = 'failed'
+            return
+        
+        started = time.perf_counter()
+        try:
+            print(f"📥 Loading IndicBERT ({self.model_name})...")
+            print("   (First time will download ~500MB model)")
+            _import_model_libraries()
+            self._configure_threads()
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            model = AutoModel.from_pretrained(self.model_name)
+            model.eval()  # Set to evaluation mode
+            if self.inference_mode == 'int8-dynamic':
+                # int8 weights for every nn.Linear, activations quantized on the fly
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+                print("   Using int8 dynamic quantization for linear layers")
+            
+            print("🧭 Preparing emotion prototype embeddings...")
+            prototypes = self._load_emotion_prototypes(tokenizer, model)
+            if prototypes is None:
+                raise RuntimeError('could not embed emotion prototypes')
+            self.model_load_seconds = round(time.perf_counter() - started, 3)
+            
+            # Warm-up pass so the first real request doesn't pay for lazy initialisation
+            warmup_started = time.perf_counter()
+            self._embed(tokenizer, model, ['यह एक महान ज्ञान और गहरे दुख की कहानी है।'])
+            self.warmup_latency_ms = round((time.perf_counter() - warmup_started) * 1000, 2)
+        except Exception as e:
+            print(f"⚠️ Could not load IndicBERT: {e}")
+            print("   Falling back to keyword-based NLP")
+            self.model_error = str(e)
+            self.model_state = 'failed'
+            return
+        
+        with self._state_lock:
+            self._model_bundle = (tokenizer, model, prototypes)
+            self.model_state = 'ready'
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+        
+        print("✅ IndicBERT loaded successfully!")
+        print(f"   Model: {self.model_name} (12 Indian languages)")
+        print(f"   Load: {self.model_load_seconds}s, warm-up: {self.warmup_latency_ms}ms")
+        
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ Model-ready callback failed: {e}")
+
     def _load_stop_words(self) -> set:
         """Indian language stop words"""
         return {
@@ -182,38 +318,300 @@ class GathaNLPEngine:
             'inspiration': ['वीर', 'महान', 'বীর', 'வீர', 'ವೀರ']
         }
 
-    def _load_language_indicators(self) -> Dict[str, List[str]]:
-        return {
-            'Hindi':   ['ा', 'ि', 'ी', 'ु', 'ू', 'ृ', 'े', 'ै', 'ो', 'ौ', 'ं', 'ः'],
-            'Marathi': ['ा', 'ि', 'ी', 'ु', 'ू', 'ृ', 'े', 'ै', 'ो', 'ौ', 'ं', 'ः'],
-            'Tamil':   ['்', 'ா', 'ி', 'ீ', 'ு', 'ூ', 'ெ', 'ே', 'ை', 'ோ', 'ௌ', 'ஂ'],
-            'Kannada': ['್', 'ಾ', 'ಿ', 'ೀ', 'ು', 'ೂ', 'ೃ', 'ೆ', 'ೇ', 'ೈ', 'ೊ', 'ೋ', 'ೌ', 'ಂ'],
-            'Bengali': ['া', 'ি', 'ী', 'ু', 'ূ', 'ৃ', 'ে', 'ৈ', 'ো', 'ৌ', 'ং', 'ঃ']
-        }
+    def _compute_lexicon_hash(self) -> str:
+        """Stable hash of the emotion lexicon, used to key on-disk caches"""
+        payload = json.dumps(self._load_emotion_keywords(), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def pipeline_fingerprint(self, use_model: bool = None) -> str:
+        """
+        Identifies everything that influences processed book results: engine version,
+        all lexicons and whether model scoring is used (and with which model).
+        `use_model` defaults to whether the model is ready right now.
+        """
+        if use_model is None:
+            use_model = self.emotion_prototypes is not None
+        scorer = self._model_key() if use_model else 'keywords-only'
+        payload = json.dumps({
+            'version': NLP_ENGINE_VERSION,
+            'scorer': scorer,
+            'emotion_keywords': self.emotion_keywords,
+            'emotion_word_roots': self.emotion_word_roots,
+            'contextual_boosters': self.contextual_boosters,
+            'stop_words': sorted(self.stop_words),
+            **({'long_documents': [Config.NLP_WINDOW_TOKENS, Config.NLP_WINDOW_STRIDE, Config.NLP_WINDOW_POOLING]}
+               if use_model and Config.NLP_LONG_DOCUMENTS else {}),
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _model_key(self) -> str:
+        """Model name, plus the inference mode when it changes the model's outputs"""
+        if self.inference_mode == 'fp32':
+            return self.model_name
+        return f"{self.model_name}@{self.inference_mode}"
+
+    def embedding_fingerprint(self) -> str:
+        """Identifies what text embeddings depend on, for caches of stored vectors"""
+        return hashlib.sha256(f"{NLP_ENGINE_VERSION}|{self._model_key()}".encode('utf-8')).hexdigest()[:16]
+
+    def _emotion_prototypes_path(self) -> str:
+        key = hashlib.sha256(f"{self._model_key()}|{self.lexicon_hash}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(Config.NLP_CACHE_DIR, f"emotion_prototypes_{key}.npy")
+
+    def _load_emotion_prototypes(self, tokenizer, model):
+        """
+        Build (or load from disk) the (num_emotions, d) matrix of emotion prototypes.
+        
+        Row i is the L2-normalised embedding of the first 10 keywords of the i-th
+        emotion in `self.emotion_keywords`. The vectors only depend on the model and
+        the lexicon, so they are embedded once and persisted under NLP_CACHE_DIR.
+        """
+        path = self._emotion_prototypes_path()
+        num_emotions = len(self.emotion_keywords)
+        
+        if os.path.exists(path):
+            try:
+                prototypes = np.load(path)
+                if prototypes.ndim == 2 and prototypes.shape[0] == num_emotions:
+                    print(f"   Loaded cached prototypes: {path}")
+                    return prototypes
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable prototype cache {path}: {e}")
+        
+        prototypes = self._embed(
+            tokenizer, model, [' '.join(keywords[:10]) for keywords in self.emotion_keywords.values()]
+        )
+        if prototypes is None:
+            print("⚠️ Could not embed emotion prototypes, model scoring disabled")
+            return None
+        
+        norms = np.linalg.norm(prototypes, axis=1, keepdims=True)
+        prototypes = prototypes / np.where(norms == 0, 1.0, norms)
+        
+        try:
+            os.makedirs(Config.NLP_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, prototypes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not persist emotion prototypes: {e}")
+        
+        return prototypes
 
     def preprocess_text(self, text: str) -> str:
         text = re.sub(r'[।॥,.\-!?;:\'\"()\[\]{}]', ' ', text)
         words = [w for w in text.split() if w not in self.stop_words and len(w) > 1]
         return ' '.join(words)
 
-    def get_text_embedding(self, text: str):
-        """✅ PRE-TRAINED MODEL: Get contextualized embedding using IndicBERT"""
-        if self.tokenizer is None or self.model is None:
+    def get_text_embedding(self, text: str, timeout: float = None):
+        """
+        ✅ PRE-TRAINED MODEL: Get contextualized embedding using IndicBERT
+        
+        With Config.NLP_MICROBATCH, concurrent callers share batched forward passes
+        through the inference scheduler. Returns None if the model is unavailable or
+        the embedding takes longer than `timeout` (default NLP_INFERENCE_TIMEOUT) seconds.
+        """
+        if self.inference_scheduler is None:
+            embeddings = self.get_text_embeddings([text])
+            if embeddings is None:
+                return None
+            return embeddings[0]
+        
+        if self.model is None:
+            return None
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get_many([text], 'cls:512')[0]
+            if cached is not None:
+                return cached
+        timeout = Config.NLP_INFERENCE_TIMEOUT if timeout is None else timeout
+        try:
+            return self.inference_scheduler.run(text, timeout)
+        except TimeoutError:
+            print(f"⚠️ Embedding timed out after {timeout}s")
+            return None
+        except Exception as e:
+            print(f"⚠️ Embedding failed: {e}")
+            return None
+
+    def _embed_with_current_model(self, texts: List[str]):
+        """Batch runner for the inference scheduler"""
+        tokenizer, model, _ = self._model_bundle
+        if tokenizer is None or model is None:
+            return None
+        return self._cached_embeddings(texts, 'cls:512', lambda missing: self._embed(tokenizer, model, missing))
+
+    def _cached_embeddings(self, texts: List[str], variant: str, compute):
+        """
+        Embeddings of `texts` from the embedding cache, running `compute` (one batch)
+        only for the distinct texts that miss it. `variant` names how texts are embedded.
+        """
+        if self.embedding_cache is None or not texts:
+            return compute(list(texts))
+        
+        vectors = self.embedding_cache.get_many(texts, variant)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = compute(missing_texts)
+            self.embedding_cache.put_many(missing_texts, computed, variant)
+            by_text = dict(zip(missing_texts, computed))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def get_text_embeddings(self, texts: List[str], batch_size: int = None, max_length: int = 512):
+        """
+        ✅ BATCHED IndicBERT embeddings
+        
+        Texts are tokenized once, sorted by token length and grouped into batches so
+        each batch is only padded to its own longest member. Returns an (N, d) float32
+        array of [CLS] embeddings in the original order, or None if the model is unavailable.
+        """
+        tokenizer, model, _ = self._model_bundle
+        if tokenizer is None or model is None:
             return None
         
         try:
-            inputs = self.tokenizer(text, return_tensors="pt", 
-                                   truncation=True, max_length=512, padding=True)
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                embedding = outputs.last_hidden_state[:, 0, :].squeeze()
+            return self._cached_embeddings(
+                texts, f'cls:{max_length}',
+                lambda missing: self._embed(tokenizer, model, missing, batch_size, max_length)
+            )
+        except Exception as e:
+            print(f"⚠️ Batched embedding failed: {e}")
+            return None
+
+    def _embed(self, tokenizer, model, texts: List[str], batch_size: int = None, max_length: int = 512):
+        batch_size = batch_size or Config.NLP_BATCH_SIZE
+        hidden_size = model.config.hidden_size
+        if not texts:
+            return np.zeros((0, hidden_size), dtype=np.float32)
+        
+        encoded = tokenizer(list(texts), truncation=True, max_length=max_length)
+        keys = list(encoded.keys())
+        order = sorted(range(len(texts)), key=lambda i: len(encoded['input_ids'][i]))
+        embeddings = np.zeros((len(texts), hidden_size), dtype=np.float32)
+        
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            features = [{k: encoded[k][i] for k in keys} for i in batch_indices]
+            embeddings[batch_indices] = self._forward(tokenizer, model, features)
+        
+        return embeddings
+
+    def _forward(self, tokenizer, model, features: List[Dict]) -> np.ndarray:
+        """[CLS] embeddings of one batch of tokenized inputs, padded to its longest member"""
+        with torch.inference_mode():
+            inputs = tokenizer.pad(features, padding=True, return_tensors="pt")
+            outputs = model(**inputs)
             
-            return embedding.numpy()
+            # [CLS] is the first non-padding token, whichever side the tokenizer pads
+            cls_positions = inputs['attention_mask'].argmax(dim=1)
+            rows = torch.arange(len(features))
+            cls = outputs.last_hidden_state[rows, cls_positions, :]
+            return cls.float().numpy()
+
+    def get_document_embeddings(self, texts: List[str], pooling: str = None, batch_size: int = None):
+        """
+        ✅ LONG-DOCUMENT IndicBERT embeddings
+        
+        Each text is streamed through overlapping token windows (Config.NLP_WINDOW_TOKENS
+        long, NLP_WINDOW_STRIDE apart) and the window embeddings are pooled into one
+        vector ('mean' or 'attention', default Config.NLP_WINDOW_POOLING). Windows run in
+        batches of `batch_size`, so memory stays bounded for texts of any length.
+        Returns an (N, d) float32 array, or None if the model is unavailable.
+        """
+        tokenizer, model, prototypes = self._model_bundle
+        if tokenizer is None or model is None:
+            return None
+        
+        if not texts:
+            return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+        
+        pooling = pooling or Config.NLP_WINDOW_POOLING
+        variant = f'doc:{Config.NLP_WINDOW_TOKENS}:{Config.NLP_WINDOW_STRIDE}:{pooling}'
+        if pooling == 'attention':
+            variant += f':{self.lexicon_hash}'  # weights come from the lexicon's prototypes
+        try:
+            return self._cached_embeddings(texts, variant, lambda missing: np.stack([
+                self._embed_document(tokenizer, model, prototypes, text, pooling, batch_size)
+                for text in missing
+            ]))
         except Exception as e:
+            print(f"⚠️ Document embedding failed: {e}")
+            return None
+
+    def get_document_embedding(self, text: str, pooling: str = None):
+        embeddings = self.get_document_embeddings([text], pooling=pooling)
+        if embeddings is None:
             return None
+        return embeddings[0]
+
+    def _embed_document(self, tokenizer, model, prototypes, text: str, pooling: str = None, batch_size: int = None):
+        batch_size = batch_size or Config.NLP_BATCH_SIZE
+        pooler = WindowPooler(pooling or Config.NLP_WINDOW_POOLING, prototypes)
+        batch = []
+        for window in token_windows(tokenizer, text, Config.NLP_WINDOW_TOKENS, Config.NLP_WINDOW_STRIDE):
+            batch.append(window)
+            if len(batch) == batch_size:
+                pooler.add(self._forward(tokenizer, model, window_features(tokenizer, batch)))
+                batch = []
+        if batch:
+            pooler.add(self._forward(tokenizer, model, window_features(tokenizer, batch)))
+        return pooler.result()
 
-    def extract_emotion_scores(self, text: str) -> Dict[str, float]:
+    def _fits_one_window(self, text: str, max_chars_per_token: int = 8) -> bool:
+        """
+        Whether `text` fits a single NLP_WINDOW_TOKENS window, where its plain [CLS]
+        embedding equals its document embedding. Decided on the tokenized length, since
+        Indic scripts can take more tokens than characters; texts too long to plausibly
+        fit are not tokenized (windowing them is correct either way).
+        """
+        tokenizer = self._model_bundle[0]
+        if tokenizer is None:
+            return False
+        prefix, suffix = special_tokens(tokenizer)
+        content = Config.NLP_WINDOW_TOKENS - len(prefix) - len(suffix)
+        if len(text) > content * max_chars_per_token:
+            return False
+        return len(tokenizer(text, add_special_tokens=False)['input_ids']) <= content
+
+    def extract_emotion_scores_batch(self, texts: List[str], batch_size: int = None,
+                                     use_model: bool = True) -> List[Dict[str, float]]:
+        """Score many texts, running the model stage as batched forward passes"""
+        embeddings = None
+        if use_model and self.emotion_prototypes is not None:
+            if Config.NLP_LONG_DOCUMENTS:
+                embeddings = self.get_document_embeddings(texts, batch_size=batch_size)
+            else:
+                embeddings = self.get_text_embeddings([t[:512] for t in texts], batch_size=batch_size)
+        
+        if embeddings is None:
+            return [self.extract_emotion_scores(t, use_model=use_model) for t in texts]
+        return [self.extract_emotion_scores(t, embedding=e) for t, e in zip(texts, embeddings)]
+
+    def analyze_texts(self, texts: List[str], use_model: bool = True, batch_size: int = None) -> List[Dict]:
+        """
+        Full per-book NLP pipeline: emotion scores (batched forward passes), detected
+        language and top key phrases. Returns one dict of processed fields per text.
+        """
+        use_model = use_model and self.emotion_prototypes is not None
+        all_emotions = self.extract_emotion_scores_batch(texts, batch_size=batch_size, use_model=use_model)
+        emotion_source = 'INDICBERT_HYBRID_70_30' if use_model else 'KEYWORD_ONLY'
+        languages = detect_languages(texts)
+        
+        return [
+            {
+                'emotion': emotions,
+                'emotion_source': emotion_source,  # Prove it's using pre-trained model!
+                'detected_language': language,
+                'extracted_phrases': self.extract_phrases(self.preprocess_text(text))[:5]
+            }
+            for text, emotions, language in zip(texts, all_emotions, languages)
+        ]
+
+    def extract_emotion_scores(self, text: str, embedding=None, use_model: bool = True,
+                               timeout: float = None) -> Dict[str, float]:
         """
         ✅ MODEL-FIRST EMOTION DETECTION
         
@@ -221,56 +619,54 @@ class GathaNLPEngine:
         1. IndicBERT embeddings (70% weight) - PRIMARY
         2. Keyword matching (20% weight) - SECONDARY
         3. Context boosters (10% weight) - TERTIARY
+        
+        `embedding` may be passed in when the caller already embedded `text[:512]`
+        (or, with Config.NLP_LONG_DOCUMENTS, the whole text through
+        `get_document_embeddings`), skipping the forward pass.
+        `use_model=False` forces keyword-only scoring. `timeout` bounds the wait for the
+        text's embedding (see get_text_embedding); keyword scores are used if it expires.
         """
         
         keyword_scores = {e: 0.0 for e in self.emotion_keywords.keys()}
         model_scores = {e: 0.0 for e in self.emotion_keywords.keys()}
         
         # ================== STRATEGY 1: IndicBERT (70%) ==================
-        if self.model is not None and self.tokenizer is not None:
-            embedding = self.get_text_embedding(text[:512])
+        # One forward pass for the text, one matrix-vector product against the
+        # cached (num_emotions, d) prototype matrix
+        prototypes = self.emotion_prototypes if use_model else None
+        if prototypes is not None:
+            if embedding is None and Config.NLP_LONG_DOCUMENTS:
+                if self._fits_one_window(text):
+                    embedding = self.get_text_embedding(text, timeout=timeout)
+                else:
+                    embedding = self.get_document_embedding(text)
+            elif embedding is None:
+                embedding = self.get_text_embedding(text[:512], timeout=timeout)
             
             if embedding is not None:
-                emotion_embeddings = {}
-                
-                for emotion, keywords in self.emotion_keywords.items():
-                    sample_keywords = ' '.join(keywords[:10])
-                    emotion_emb = self.get_text_embedding(sample_keywords)
-                    
-                    if emotion_emb is not None:
-                        emotion_embeddings[emotion] = emotion_emb
-                
-                for emotion, emotion_emb in emotion_embeddings.items():
-                    try:
-                        similarity = np.dot(embedding, emotion_emb) / (
-                            np.linalg.norm(embedding) * np.linalg.norm(emotion_emb)
-                        )
-                        model_scores[emotion] = max(0, (similarity + 1) / 2) * 10.0
-                    except:
-                        model_scores[emotion] = 0.5
+                norm = np.linalg.norm(embedding)
+                if norm > 0:
+                    similarities = prototypes @ (embedding / norm)
+                    for emotion, similarity in zip(self.emotion_keywords.keys(), similarities):
+                        model_scores[emotion] = max(0, (float(similarity) + 1) / 2) * 10.0
+        
+        # Keywords, roots and boosters are all counted in one automaton pass
+        keyword_counts, root_hits, booster_hits = self.lexicon_matcher.match(text)
         
         # ================== STRATEGY 2: Keywords (20%) ==================
-        for emotion, keywords in self.emotion_keywords.items():
-            for keyword in keywords:
-                count = text.count(keyword)
-                if count > 0:
-                    keyword_scores[emotion] += count * 0.5
-        
-        for emotion, roots in self.emotion_word_roots.items():
-            for root in roots:
-                for word in text.split():
-                    if root in word and len(root) >= 3:
-                        keyword_scores[emotion] += 0.3
+        for emotion in self.emotion_keywords.keys():
+            keyword_scores[emotion] += keyword_counts[emotion] * 0.5
+            # Added one hit at a time so scores stay bit-identical to per-word summing
+            for _ in range(root_hits[emotion]):
+                keyword_scores[emotion] += 0.3
         
         # ================== STRATEGY 3: Boosters (10%) ==================
         booster_scores = {e: 0.0 for e in self.emotion_keywords.keys()}
-        for emotion, boosters in self.contextual_boosters.items():
-            for booster in boosters:
-                if booster in text:
-                    booster_scores[emotion] += 0.5
+        for emotion, hits in booster_hits.items():
+            booster_scores[emotion] += hits * 0.5
         
         # ================== WEIGHTED COMBINATION ==================
-        if self.model is not None and sum(model_scores.values()) > 0:
+        if prototypes is not None and sum(model_scores.values()) > 0:
             final_scores = {}
             for emotion in self.emotion_keywords.keys():
                 final_scores[emotion] = (
@@ -295,26 +691,23 @@ class GathaNLPEngine:
         return {e: s / total for e, s in final_scores.items()}
 
     def detect_language(self, text: str) -> str:
-        text_sample = text[:200]
-        lang_scores = {}
-        
-        for language, indicators in self.language_indicators.items():
-            count = sum(text_sample.count(ind) for ind in indicators)
-            lang_scores[language] = count
-        
-        detected = max(lang_scores, key=lang_scores.get)
-        return detected if lang_scores[detected] > 0 else 'Hindi'
+        """Language from the text's dominant script (Hindi vs Marathi by function words), see language_detector"""
+        return detect_language(text)
+
+    def build_semantic_index(self, texts: List[str]) -> SemanticIndex:
+        """Fit a character n-gram TF-IDF index over `texts` once, for repeated searches"""
+        return SemanticIndex(texts, preprocessor=lambda text: self.preprocess_text(text.lower()))
 
     def semantic_search(self, query: str, texts: List[str], top_k: int = 5) -> List[Tuple[int, float]]:
-        try:
-            all_texts = [query] + texts
-            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-            similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
-            
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            return [(int(idx), float(similarities[idx])) for idx in top_indices]
-        except Exception as e:
-            return []
+        # The index is reused while the same (unmodified) list object is passed, so only
+        # the query is transformed; hashing the texts would cost a pass over the corpus
+        # per query. Callers with a corpus snapshot should hold the index themselves
+        # (app.get_semantic_index).
+        cached = self._semantic_index
+        if cached is None or cached[0] is not texts or cached[1] != len(texts):
+            cached = (texts, len(texts), self.build_semantic_index(texts))
+            self._semantic_index = cached
+        return cached[2].search(query, top_k)
 
     def generate_suggestions(self, query: str, book_titles: List[str]) -> List[str]:
         matches = [t for t in book_titles if query.lower() in t.lower()]
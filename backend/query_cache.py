@@ -0,0 +1,127 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from config import Config
+
+_MISSING = object()
+
+
+def approx_size(value) -> int:
+    """
+    Rough memory footprint of a cached value in bytes. Containers are measured
+    shallowly plus their string/number items; shared objects they merely reference
+    (e.g. book records) are not counted, since caching does not copy them.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.keys()) + list(value.values())
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        return size
+    for item in items:
+        if isinstance(item, (str, int, float)):
+            size += sys.getsizeof(item)
+        elif isinstance(item, tuple):
+            size += approx_size(item)
+    return size
+
+
+class QueryCache:
+    """
+    Bounded in-process cache with LRU eviction, a TTL and a memory cap.
+
+    Entries can be tied to a corpus version: the first lookup with a different
+    version drops everything cached for the old one. Hit, miss and eviction counters
+    are exposed through `stats()`.
+    """
+
+    def __init__(self, name: str, ttl: float = None, max_entries: int = None, max_bytes: int = None):
+        self.name = name
+        self.ttl = Config.CACHE_TIMEOUT if ttl is None else ttl
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.CACHE_MAX_BYTES
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_version(self, version) -> bool:
+        """Move to a newer corpus version; False if `version` is older than the cache's"""
+        if version is None or version == self._version:
+            return True
+        if self._version is not None and version < self._version:
+            return False
+        self._entries.clear()
+        self._bytes = 0
+        self._version = version
+        return True
+
+    def get(self, key: Hashable, version=None):
+        """Cached value for `key`, or None"""
+        value = self._lookup(key, version)
+        return None if value is _MISSING else value
+
+    def _lookup(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value, version=None):
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object], version=None):
+        value = self._lookup(key, version)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'ttl_seconds': self.ttl
+            }
@@ -0,0 +1,66 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+# Blend of the related-books score: cosine similarity of the emotion profiles
+# (and of the excerpt embeddings, when available) plus bonuses for books by the
+# same author or in the same language
+EMOTION_WEIGHT = 0.6
+EMBEDDING_WEIGHT = 0.4
+AUTHOR_BONUS = 0.15
+LANGUAGE_BONUS = 0.05
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+class RelatedBooksGraph:
+    """
+    Top-k related books for every row of a corpus, computed once per snapshot.
+
+    Neighbours are stored as an int32 (num_books, k) array of rows, best first and
+    padded with -1, so a lookup is a single row slice. Scores are computed block by
+    block, keeping memory at O(block * num_books) instead of the full pairwise matrix.
+    """
+
+    def __init__(self, books: List[Dict], emotion_matrix: np.ndarray,
+                 embeddings: Optional[np.ndarray] = None, k: int = 10, block: int = 1024):
+        n = len(books)
+        self.k = k
+        self.uses_embeddings = embeddings is not None
+        self.neighbours = np.full((n, k), -1, dtype=np.int32)
+        self.scores = np.zeros((n, k), dtype=np.float32)
+        if n < 2 or k <= 0:
+            return
+
+        emotions = _unit_rows(emotion_matrix)
+        if embeddings is not None:
+            embeddings = _unit_rows(embeddings)
+        _, authors = np.unique([book['author'] for book in books], return_inverse=True)
+        _, languages = np.unique([book['language'] for book in books], return_inverse=True)
+        top = min(k, n - 1)
+
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            if embeddings is None:
+                scores = emotions[start:stop] @ emotions.T
+            else:
+                scores = (EMOTION_WEIGHT * (emotions[start:stop] @ emotions.T)
+                          + EMBEDDING_WEIGHT * (embeddings[start:stop] @ embeddings.T))
+            scores += AUTHOR_BONUS * (authors[start:stop, None] == authors[None, :])
+            scores += LANGUAGE_BONUS * (languages[start:stop, None] == languages[None, :])
+            rows = np.arange(start, stop)
+            scores[rows - start, rows] = -np.inf  # a book is not related to itself
+
+            best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            # Highest score first, ties broken by corpus order
+            order = np.lexsort((best, -best_scores), axis=1)
+            self.neighbours[start:stop, :top] = np.take_along_axis(best, order, axis=1)
+            self.scores[start:stop, :top] = np.take_along_axis(best_scores, order, axis=1)
+
+    def related(self, row: int, limit: int = 3) -> List[int]:
+        """Rows of up to `limit` books most related to `row`, best first"""
+        neighbours = self.neighbours[row, :limit]
+        return [int(r) for r in neighbours if r >= 0]
@@ -0,0 +1,222 @@
+import bisect
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+# Substrings up to this length are indexed directly; longer queries intersect
+# the postings of their NGRAM-length substrings and verify the candidates
+NGRAM = 3
+
+# Relevance tiers of a catalogue text match, highest first
+AUTHOR_EXACT = 1000
+TITLE_EXACT = 800
+AUTHOR_PARTIAL = 500
+TITLE_PARTIAL = 300
+KEYWORD_PARTIAL = 200
+
+
+def _ngrams(text: str, max_n: int = NGRAM) -> Set[str]:
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class CatalogueIndex:
+    """
+    Inverted index over the searchable catalogue fields of a processed corpus.
+
+    Author, title (native and romanized) and keywords are lowercased once at build
+    time, and every substring of up to NGRAM characters maps to the rows containing
+    it. `search` returns row numbers into `books` ordered exactly like the original
+    linear scan: by relevance tier, then by corpus order.
+    """
+
+    def __init__(self, books: List[Dict]):
+        self.books = books
+        self._authors = []
+        self._titles = []
+        self._keywords = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._rows_by_language: Dict[str, Set[int]] = {}
+        self._rows_by_content_type: Dict[str, Set[int]] = {}
+
+        for row, book in enumerate(books):
+            authors = (book['author'].lower(), book.get('romanized_author', '').lower())
+            titles = (book['title'].lower(), book.get('romanized_title', '').lower())
+            keywords = tuple(kw.lower() for kw in book.get('keywords') or ())
+            self._authors.append(authors)
+            self._titles.append(titles)
+            self._keywords.append(keywords)
+
+            for field in authors + titles + keywords:
+                for gram in _ngrams(field):
+                    self._postings.setdefault(gram, set()).add(row)
+
+            for language in {book['language'].lower(), book['original_language'].lower()}:
+                self._rows_by_language.setdefault(language, set()).add(row)
+            self._rows_by_content_type.setdefault(book['content_type'].lower(), set()).add(row)
+
+    def _candidates(self, query: str) -> Set[int]:
+        if len(query) <= NGRAM:
+            return self._postings.get(query, set())
+
+        # Intersect the rarest grams first so the working set shrinks quickly
+        grams = sorted(
+            {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)},
+            key=lambda gram: len(self._postings.get(gram, ()))
+        )
+        candidates = None
+        for gram in grams:
+            rows = self._postings.get(gram)
+            if not rows:
+                return set()
+            candidates = set(rows) if candidates is None else candidates & rows
+            if not candidates:
+                break
+        return candidates
+
+    def score(self, row: int, query: str) -> int:
+        """Relevance tier of `row` for a lowercased query, 0 if it does not match"""
+        authors = self._authors[row]
+        titles = self._titles[row]
+        if query in authors:
+            return AUTHOR_EXACT
+        if any(query in author for author in authors):
+            return AUTHOR_PARTIAL
+        if query in titles:
+            return TITLE_EXACT
+        if any(query in title for title in titles):
+            return TITLE_PARTIAL
+        if any(query in keyword for keyword in self._keywords[row]):
+            return KEYWORD_PARTIAL
+        return 0
+
+    def match(self, query: Optional[str] = None, language: Optional[str] = None,
+              content_type: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Unordered (score, row) pairs matching all given filters; score is 0 without a query"""
+        allowed = None
+        if language:
+            allowed = self._rows_by_language.get(language.lower(), set())
+        if content_type:
+            rows = self._rows_by_content_type.get(content_type.lower(), set())
+            allowed = rows if allowed is None else allowed & rows
+
+        if not query:
+            rows = range(len(self.books)) if allowed is None else allowed
+            return [(0, row) for row in rows]
+
+        query = query.lower()
+        candidates = self._candidates(query)
+        if allowed is not None:
+            candidates = candidates & allowed
+
+        matches = []
+        for row in candidates:
+            score = self.score(row, query)
+            if score:
+                matches.append((score, row))
+        return matches
+
+    def search(self, query: Optional[str] = None, language: Optional[str] = None,
+               content_type: Optional[str] = None) -> List[int]:
+        """Rows matching all given filters, best text matches first, then corpus order"""
+        matches = self.match(query, language, content_type)
+        return [row for _, row in sorted(matches, key=lambda m: (-m[0], m[1]))]
+
+
+class AutocompleteIndex:
+    """
+    Prebuilt autocomplete over titles, authors and their romanized forms.
+
+    Suggestions are de-duplicated case-insensitively and ranked by match kind (whole
+    suggestion starts with the query, then a word of it does, then the query occurs
+    anywhere), then by corpus order. Top suggestions for short prefixes are
+    precomputed, like a trie storing its best completions at each node. Longer
+    prefixes use binary search over sorted keys, and infix matches fall back to
+    n-gram postings.
+    """
+
+    PREFIX_CACHE_LEN = 6
+
+    def __init__(self, books: List[Dict], max_suggestions: int = 10):
+        self.books = books
+        self.max_suggestions = max_suggestions
+        self.suggestions: List[str] = []
+        self._keys: List[str] = []
+
+        seen = set()
+        for book in books:
+            for text in (book['title'], book['author'],
+                         book.get('romanized_title'), book.get('romanized_author')):
+                if not text or text.lower() in seen:
+                    continue
+                seen.add(text.lower())
+                self.suggestions.append(text)
+                self._keys.append(text.lower())
+
+        # Each tier may have to skip suggestions already returned by a higher tier
+        cache_size = 2 * max_suggestions
+        self._top_by_prefix: Dict[str, List[int]] = {}
+        self._top_by_word_prefix: Dict[str, List[int]] = {}
+        sorted_keys = []
+        sorted_words = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for entry, key in enumerate(self._keys):
+            sorted_keys.append((key, entry))
+            self._add_prefixes(self._top_by_prefix, key, entry, cache_size)
+            for word in set(key.split()):
+                sorted_words.append((word, entry))
+                self._add_prefixes(self._top_by_word_prefix, word, entry, cache_size)
+            for gram in _ngrams(key):
+                self._postings.setdefault(gram, []).append(entry)
+
+        sorted_keys.sort()
+        sorted_words.sort()
+        self._sorted_keys = [key for key, _ in sorted_keys]
+        self._sorted_key_entries = [entry for _, entry in sorted_keys]
+        self._sorted_words = [word for word, _ in sorted_words]
+        self._sorted_word_entries = [entry for _, entry in sorted_words]
+
+    def _add_prefixes(self, table, text, entry, cache_size):
+        for n in range(1, min(len(text), self.PREFIX_CACHE_LEN) + 1):
+            top = table.setdefault(text[:n], [])
+            if len(top) < cache_size and (not top or top[-1] != entry):
+                top.append(entry)
+
+    def _prefix_matches(self, table, sorted_texts, sorted_entries, query, count):
+        if len(query) <= self.PREFIX_CACHE_LEN:
+            return table.get(query, [])
+        lo = bisect.bisect_left(sorted_texts, query)
+        hi = bisect.bisect_left(sorted_texts, query + '\U0010ffff', lo)
+        return heapq.nsmallest(count, set(sorted_entries[lo:hi]))
+
+    def _infix_matches(self, query):
+        if len(query) <= NGRAM:
+            return self._postings.get(query, [])
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        shortest = min((self._postings.get(gram, []) for gram in grams), key=len)
+        return [entry for entry in shortest if query in self._keys[entry]]
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        query = query.lower()
+        limit = max(1, min(limit, self.max_suggestions))
+        results = []
+        seen = set()
+
+        tiers = (
+            lambda: self._prefix_matches(self._top_by_prefix, self._sorted_keys,
+                                         self._sorted_key_entries, query, 2 * limit),
+            lambda: self._prefix_matches(self._top_by_word_prefix, self._sorted_words,
+                                         self._sorted_word_entries, query, 2 * limit),
+            lambda: self._infix_matches(query),
+        )
+        for matches in tiers:
+            for entry in matches():
+                if entry not in seen:
+                    seen.add(entry)
+                    results.append(entry)
+                    if len(results) == limit:
+                        return [self.suggestions[e] for e in results]
+        return [self.suggestions[e] for e in results]
@@ -0,0 +1,59 @@
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Character n-grams within word boundaries: robust to Indic inflection, sandhi and
+# spelling variants (matras, nukta) where whole-word tokens rarely match exactly
+NGRAM_RANGE = (2, 4)
+MAX_FEATURES = 50000
+
+
+class SemanticIndex:
+    """
+    TF-IDF index over a fixed list of texts, fitted once.
+
+    The vocabulary and IDF weights are learned at build time; queries are only
+    `transform`ed, so searching never mutates shared state and is safe to run from
+    concurrent requests. Rows are L2-normalized, so cosine similarity is a single
+    sparse matrix-vector product.
+    """
+
+    def __init__(self, texts: List[str], preprocessor: Optional[Callable[[str], str]] = None):
+        self.size = len(texts)
+        self.vectorizer = TfidfVectorizer(
+            analyzer='char_wb',
+            ngram_range=NGRAM_RANGE,
+            lowercase=True,
+            preprocessor=preprocessor,
+            sublinear_tf=True,
+            max_features=MAX_FEATURES,
+            dtype=np.float32
+        )
+        self.matrix = None
+        if any(text and text.strip() for text in texts):
+            try:
+                self.matrix = self.vectorizer.fit_transform(texts).tocsr()
+            except ValueError:
+                # Nothing left to index after preprocessing
+                self.matrix = None
+
+    def search(self, query: str, top_k: int = 5, min_score: float = None) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) pairs of the top_k most similar texts, best first"""
+        if self.matrix is None or top_k <= 0 or not query:
+            return []
+
+        query_vector = self.vectorizer.transform([query])
+        similarities = np.asarray((self.matrix @ query_vector.T).todense()).ravel()
+
+        k = min(top_k, self.size)
+        if k < self.size:
+            top = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            top = np.arange(self.size)
+        # Highest similarity first, ties broken by row
+        top = top[np.lexsort((top, -similarities[top]))]
+
+        results = [(int(row), float(similarities[row])) for row in top]
+        if min_score is not None:
+            results = [(row, score) for row, score in results if score > min_score]
+        return results
@@ -0,0 +1,57 @@
+import threading
+from typing import Callable, Optional
+
+
+class SnapshotBuilder:
+    """
+    Runs expensive per-snapshot builds (app.prepare_corpus) on a background thread,
+    so neither startup nor publishing a corpus waits for them.
+
+    `submit` queues a published snapshot. Only the newest one waits: a snapshot
+    superseded before its turn is skipped, so a burst of publishes costs at most one
+    build beyond the one already running. `latest` is the last snapshot whose build
+    finished, for serving its results while a newer snapshot is being built.
+    """
+
+    def __init__(self, build: Callable[[object], None], name: str = 'snapshot-builder'):
+        self.build = build
+        self.name = name
+        self.latest = None
+        self._pending = None
+        self._building = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self.builds = 0
+        self.skipped = 0
+
+    def submit(self, corpus):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._build_forever, name=self.name, daemon=True)
+                self._thread.start()
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = corpus
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted snapshot is built or skipped; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._building, timeout)
+
+    def _build_forever(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                corpus, self._pending = self._pending, None
+                self._building = True
+            try:
+                self.build(corpus)
+                self.latest = corpus
+            except Exception as e:
+                print(f"⚠️ Background build of corpus version {corpus.version} failed: {e}")
+            finally:
+                with self._condition:
+                    self._building = False
+                    self.builds += 1
+                    self._condition.notify_all()
@@ -0,0 +1,44 @@
+import copy
+import json
+
+import pytest
+
+from book_record import BookRecord
+from corpus import ProcessedCorpus
+from mock_database import MOCK_BOOKS
+
+
+def processed(book):
+    return {**copy.deepcopy(book), 'emotion_source': 'KEYWORD_ONLY', 'detected_language': book['language'],
+            'extracted_phrases': ['एक दो', 'दो तीन'], 'custom_field': {'nested': [1, 2]}}
+
+
+@pytest.mark.parametrize('book', MOCK_BOOKS, ids=lambda book: str(book['id']))
+def test_to_dict_round_trips_mock_books(book):
+    original = processed(book)
+    record = BookRecord(original)
+
+    assert record.to_dict() == original
+    assert dict(record) == {**record} == {key: record[key] for key in original}
+    assert json.dumps(record.to_dict(), ensure_ascii=False, sort_keys=True) == \
+        json.dumps(original, ensure_ascii=False, sort_keys=True)
+    assert len(record) == len(original) and set(record) == set(original)
+
+
+def test_mapping_behaviour_of_missing_fields():
+    record = BookRecord({'id': 1, 'title': 'गोदान'})
+    assert 'year' not in record and record.get('year') is None
+    with pytest.raises(KeyError):
+        record['year']
+    with pytest.raises(KeyError):
+        record['unknown']
+    with pytest.raises(AttributeError):
+        record.title = 'changed'
+
+
+def test_corpus_lookups():
+    corpus = ProcessedCorpus([processed(book) for book in MOCK_BOOKS], version=1)
+    assert corpus.book(3)['id'] == 3 and corpus.book(424242) is None
+    assert [book['id'] for book in corpus.books_by_ids([7, 3, 3, 424242])] == [3, 7]
+    author = MOCK_BOOKS[0]['author']
+    assert [b['id'] for b in corpus.books_by_author(author)] == [b['id'] for b in MOCK_BOOKS if b['author'] == author]
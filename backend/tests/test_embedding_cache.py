@@ -0,0 +1,97 @@
+import builtins
+
+import numpy as np
+import pytest
+
+import embedding_cache
+from embedding_cache import DIGEST_BYTES, DiskEmbeddingStore, EmbeddingCache
+
+
+def digest(i):
+    return i.to_bytes(DIGEST_BYTES, 'big')
+
+
+def vectors_for(ids, dim=4):
+    return np.array([[i, i + 0.5, -i, 1.0][:dim] for i in ids], dtype=np.float32)
+
+
+def assert_lookups(directory, ids):
+    store = DiskEmbeddingStore(str(directory), max_rows=1000)
+    for i in ids:
+        np.testing.assert_array_equal(store.get(digest(i)), vectors_for([i])[0])
+    return store
+
+
+class CrashBeforeKeys(Exception):
+    pass
+
+
+def crash_between_appends(monkeypatch, keys_bytes=0):
+    """Make the next keys.bin append write `keys_bytes` bytes and then die"""
+    real_open = builtins.open
+
+    class DyingFile:
+        def __init__(self, f):
+            self._f = f
+
+        def write(self, data):
+            self._f.write(data[:keys_bytes])
+            self._f.flush()
+            raise CrashBeforeKeys()
+
+        def __getattr__(self, name):
+            return getattr(self._f, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._f.close()
+
+    def fake_open(path, mode='r', *args, **kwargs):
+        f = real_open(path, mode, *args, **kwargs)
+        if str(path).endswith('keys.bin') and 'a' in mode:
+            monkeypatch.setattr(embedding_cache, 'open', real_open, raising=False)
+            return DyingFile(f)
+        return f
+
+    monkeypatch.setattr(embedding_cache, 'open', fake_open, raising=False)
+
+
+def test_rows_stay_aligned_after_reopen(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), max_rows=1000)
+    store.put_many([digest(i) for i in range(3)], vectors_for(range(3)))
+    store.put_many([digest(i) for i in range(2, 6)], vectors_for(range(2, 6)))
+    assert len(store) == 6
+    assert len(assert_lookups(tmp_path, range(6))) == 6
+
+
+@pytest.mark.parametrize('keys_bytes', [0, DIGEST_BYTES // 2])
+def test_crash_between_vector_and_key_append(tmp_path, monkeypatch, keys_bytes):
+    DiskEmbeddingStore(str(tmp_path), max_rows=1000).put_many(
+        [digest(i) for i in range(3)], vectors_for(range(3))
+    )
+
+    crash_between_appends(monkeypatch, keys_bytes)
+    with pytest.raises(CrashBeforeKeys):
+        DiskEmbeddingStore(str(tmp_path), max_rows=1000).put_many(
+            [digest(i) for i in range(10, 13)], vectors_for(range(10, 13))
+        )
+
+    # A later writer (another process or a restart) appends after the orphaned rows
+    DiskEmbeddingStore(str(tmp_path), max_rows=1000).put_many(
+        [digest(i) for i in range(20, 24)], vectors_for(range(20, 24))
+    )
+    store = assert_lookups(tmp_path, list(range(3)) + list(range(20, 24)))
+    assert all(store.get(digest(i)) is None for i in range(10, 13))
+    assert (tmp_path / 'keys.bin').stat().st_size == 7 * DIGEST_BYTES
+    assert (tmp_path / 'vectors.f32').stat().st_size == 7 * 4 * 4
+
+
+def test_cache_normalizes_text_and_separates_variants(tmp_path):
+    cache = EmbeddingCache('model', memory_entries=0, disk_rows=100, directory=str(tmp_path))
+    cache.put_many(['प्रेम  की\tकहानी'], vectors_for([1]), variant='cls:512')
+
+    reopened = EmbeddingCache('model', memory_entries=0, disk_rows=100, directory=str(tmp_path))
+    np.testing.assert_array_equal(reopened.get_many(['प्रेम की कहानी'], 'cls:512')[0], vectors_for([1])[0])
+    assert reopened.get_many(['प्रेम की कहानी'], 'cls:128') == [None]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from related_books import AUTHOR_BONUS, EMBEDDING_WEIGHT, EMOTION_WEIGHT, LANGUAGE_BONUS, RelatedBooksGraph
+
+
+def unit(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def brute_force(books, emotions, embeddings, k):
+    """Full pairwise cosine scores in float64, sorted per row"""
+    scores = unit(emotions) @ unit(emotions).T
+    if embeddings is not None:
+        scores = EMOTION_WEIGHT * scores + EMBEDDING_WEIGHT * (unit(embeddings) @ unit(embeddings).T)
+    authors = np.array([book['author'] for book in books])
+    languages = np.array([book['language'] for book in books])
+    scores += AUTHOR_BONUS * (authors[:, None] == authors[None, :])
+    scores += LANGUAGE_BONUS * (languages[:, None] == languages[None, :])
+    np.fill_diagonal(scores, -np.inf)
+    neighbours = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    return neighbours, np.take_along_axis(scores, neighbours, axis=1)
+
+
+@pytest.mark.parametrize('with_embeddings', [False, True])
+def test_matches_brute_force_top_k(with_embeddings):
+    rng = np.random.default_rng(7)
+    n, k = 150, 10
+    books = [{'author': f'author-{rng.integers(20)}', 'language': f'lang-{rng.integers(4)}'} for _ in range(n)]
+    emotions = rng.dirichlet(np.ones(8), size=n)
+    embeddings = rng.normal(size=(n, 16)) if with_embeddings else None
+
+    graph = RelatedBooksGraph(books, emotions, embeddings, k=k, block=32)
+    expected, expected_scores = brute_force(books, emotions, embeddings, k)
+
+    np.testing.assert_array_equal(graph.neighbours, expected)
+    np.testing.assert_allclose(graph.scores, expected_scores, atol=1e-5)
+    assert graph.related(0, 3) == [int(r) for r in expected[0, :3]]
+
+
+def test_small_corpus_pads_with_minus_one():
+    books = [{'author': 'a', 'language': 'Hindi'}, {'author': 'b', 'language': 'Hindi'}]
+    graph = RelatedBooksGraph(books, np.array([[1.0, 0.0], [0.5, 0.5]]), k=3)
+    assert graph.neighbours.tolist() == [[1, -1, -1], [0, -1, -1]]
+    assert graph.related(1) == [0]
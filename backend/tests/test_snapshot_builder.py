@@ -0,0 +1,57 @@
+import threading
+
+from corpus import ProcessedCorpus
+from mock_database import MOCK_BOOKS
+from snapshot_builder import SnapshotBuilder
+
+
+def corpus(version):
+    return ProcessedCorpus([{**book, 'emotion': {}} for book in MOCK_BOOKS], version=version)
+
+
+def test_only_the_newest_waiting_snapshot_is_built():
+    started, release = threading.Event(), threading.Event()
+    built = []
+
+    def build(snapshot):
+        started.set()
+        release.wait(5)
+        built.append(snapshot.version)
+
+    builder = SnapshotBuilder(build)
+    builder.submit(corpus(1))
+    assert started.wait(5)
+    for version in (2, 3, 4):  # published while version 1 is being built
+        builder.submit(corpus(version))
+    release.set()
+
+    assert builder.wait(5)
+    assert built == [1, 4]
+    assert builder.skipped == 2
+    assert builder.latest.version == 4
+
+
+def test_failed_build_keeps_the_previous_latest():
+    def build(snapshot):
+        if snapshot.version == 2:
+            raise ValueError('boom')
+
+    builder = SnapshotBuilder(build)
+    builder.submit(corpus(1))
+    assert builder.wait(5)
+    builder.submit(corpus(2))
+    assert builder.wait(5)
+    assert builder.latest.version == 1
+
+
+def test_add_derived_starts_a_revision_in_a_later_second():
+    snapshot = corpus(1)
+    published_at = snapshot.modified_at
+    assert snapshot.peek('graph') is None
+
+    snapshot.add_derived({'graph': 'built'})
+
+    assert snapshot.peek('graph') == 'built'
+    assert snapshot.revision == 1
+    assert snapshot.modified_at > published_at
+    assert snapshot.last_modified_is_unique
@@ -0,0 +1,174 @@
+import re
+from collections import deque
+from typing import Dict, List, Iterator, Tuple
+
+# Optional C implementation (pip install pyahocorasick); the pure-Python automaton
+# below produces the same matches
+try:
+    import ahocorasick
+    PYAHOCORASICK_AVAILABLE = True
+except ImportError:
+    PYAHOCORASICK_AVAILABLE = False
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher.
+
+    `iter_matches(text)` yields `(end_index, pattern_id)` for every occurrence of every
+    pattern, overlapping ones included, in a single left-to-right pass over the text.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._automaton = None
+
+        if PYAHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for pattern_id, pattern in enumerate(self.patterns):
+                self._automaton.add_word(pattern, pattern_id)
+            self._automaton.make_automaton()
+            return
+
+        # Trie: goto[state] maps a character to the next state
+        self._goto = [{}]
+        self._outputs = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(pattern_id)
+
+        # Failure links (BFS), merging each state's outputs with its failure state's
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        self._outputs = [tuple(out) for out in self._outputs]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        if self._automaton is not None:
+            if len(self._automaton):
+                yield from self._automaton.iter(text)
+            return
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in outputs[state]:
+                yield index, pattern_id
+
+
+_WHITESPACE = re.compile(r'\s')
+
+
+class EmotionLexiconMatcher:
+    """
+    Compiles the emotion keyword, word-root and contextual-booster lexicons into one
+    automaton, so the keyword stage of emotion scoring is a single pass over the text.
+
+    `match(text)` returns three dicts keyed by emotion, with the same semantics as the
+    per-entry scans they replace:
+      - keyword counts: non-overlapping occurrences (`text.count(keyword)`), summed over
+        every keyword entry of the emotion
+      - root hits: number of (root, word of `text.split()`) pairs where the root occurs
+        in the word, for roots of at least 3 characters
+      - booster hits: number of boosters that occur anywhere in the text
+    """
+
+    def __init__(self, emotion_keywords: Dict[str, List[str]],
+                 emotion_word_roots: Dict[str, List[str]],
+                 contextual_boosters: Dict[str, List[str]]):
+        self.emotions = list(emotion_keywords.keys())
+        patterns = []
+        pattern_ids = {}
+
+        def pattern_id(pattern):
+            if pattern not in pattern_ids:
+                pattern_ids[pattern] = len(patterns)
+                patterns.append(pattern)
+                self._keyword_entries.append([])
+                self._root_entries.append([])
+                self._booster_entries.append([])
+            return pattern_ids[pattern]
+
+        # Per pattern id: the emotions it contributes to in each role. Lexicon lists may
+        # repeat an entry, and each repetition counts, so entries are not de-duplicated.
+        self._keyword_entries = []
+        self._root_entries = []
+        self._booster_entries = []
+
+        for emotion, keywords in emotion_keywords.items():
+            for keyword in keywords:
+                if keyword:
+                    self._keyword_entries[pattern_id(keyword)].append(emotion)
+        for emotion, roots in emotion_word_roots.items():
+            for root in roots:
+                # A root containing whitespace can never be inside a single word
+                if len(root) >= 3 and not _WHITESPACE.search(root):
+                    self._root_entries[pattern_id(root)].append(emotion)
+        for emotion, boosters in contextual_boosters.items():
+            for booster in boosters:
+                if booster:
+                    self._booster_entries[pattern_id(booster)].append(emotion)
+
+        self._lengths = [len(p) for p in patterns]
+        self._automaton = AhoCorasick(patterns)
+
+    def match(self, text: str) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+        keyword_counts = dict.fromkeys(self.emotions, 0)
+        root_hits = dict.fromkeys(self.emotions, 0)
+        booster_hits = dict.fromkeys(self.emotions, 0)
+
+        keyword_entries, root_entries = self._keyword_entries, self._root_entries
+        lengths = self._lengths
+        last_keyword_end = {}
+        last_root_end = {}
+        boosters_seen = set()
+
+        for end, pattern_id in self._automaton.iter_matches(text):
+            start = end - lengths[pattern_id] + 1
+
+            emotions = keyword_entries[pattern_id]
+            if emotions and start > last_keyword_end.get(pattern_id, -1):
+                # str.count semantics: the next occurrence must start after this one ends
+                last_keyword_end[pattern_id] = end
+                for emotion in emotions:
+                    keyword_counts[emotion] += 1
+
+            emotions = root_entries[pattern_id]
+            if emotions:
+                previous_end = last_root_end.get(pattern_id)
+                # Count each word once: a new word starts only if whitespace separates
+                # this occurrence from the previous one
+                if previous_end is None or (
+                    start > previous_end + 1 and _WHITESPACE.search(text, previous_end + 1, start)
+                ):
+                    for emotion in emotions:
+                        root_hits[emotion] += 1
+                last_root_end[pattern_id] = end
+
+            if self._booster_entries[pattern_id]:
+                boosters_seen.add(pattern_id)
+
+        for pattern_id in boosters_seen:
+            for emotion in self._booster_entries[pattern_id]:
+                booster_hits[emotion] = booster_hits.get(emotion, 0) + 1
+
+        return keyword_counts, root_hits, booster_hits
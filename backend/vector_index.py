@@ -0,0 +1,175 @@
+import os
+import glob
+import json
+import numpy as np
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over L2-normalized float32 vectors, one per id.
+
+    Vectors live in a .npy file that is opened memory-mapped, so every server process
+    using the same file shares one copy through the OS page cache. The id map is
+    stored next to it as JSON. Search is exact (one matrix-vector product plus
+    argpartition) unless `build_ivf` has been called, in which case only the vectors
+    in the inverted lists of the closest k-means centroids are scored.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: Sequence[Hashable]):
+        if len(vectors) != len(ids):
+            raise ValueError(f'{len(vectors)} vectors for {len(ids)} ids')
+        self.vectors = vectors
+        self.ids = list(ids)
+        self._rows = {id_: row for row, id_ in enumerate(self.ids)}
+        self._centroids = None
+        self._lists = None
+        self.n_probe = None
+
+    @staticmethod
+    def _paths(path: str) -> Tuple[str, str]:
+        return f'{path}.npy', f'{path}.ids.json'
+
+    @classmethod
+    def build(cls, path: str, ids: Sequence[Hashable], vectors: np.ndarray) -> 'VectorIndex':
+        """Normalize and write `vectors` (and the id map) under `path`, then open them"""
+        vectors_path, ids_path = cls._paths(path)
+        os.makedirs(os.path.dirname(vectors_path) or '.', exist_ok=True)
+        vectors = _normalize(vectors)
+
+        # Write to temporary files and rename, so concurrent readers never see a partial file
+        suffix = f'.{os.getpid()}.tmp'
+        with open(ids_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(list(ids), f)
+        os.replace(ids_path + suffix, ids_path)
+        with open(vectors_path + suffix, 'wb') as f:
+            np.save(f, vectors)
+        os.replace(vectors_path + suffix, vectors_path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> Optional['VectorIndex']:
+        """Memory-map an index written by `build`, or None if it does not exist"""
+        vectors_path, ids_path = cls._paths(path)
+        if not (os.path.exists(vectors_path) and os.path.exists(ids_path)):
+            return None
+        with open(ids_path, 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+        return cls(np.load(vectors_path, mmap_mode='r'), ids)
+
+    @classmethod
+    def open_or_build(cls, path: str, ids: Sequence[Hashable],
+                      compute: Callable[[], Optional[np.ndarray]]) -> Optional['VectorIndex']:
+        """
+        Open the index at `path`, or build it from `compute()` (None if that returns None).
+        `path` should be a content address of the vectors, so that whichever process
+        builds first writes the file and the others simply map it.
+        """
+        try:
+            index = cls.open(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable vector index {path}: {e}")
+            index = None
+        if index is not None and index.ids == list(ids):
+            return index
+
+        vectors = compute()
+        if vectors is None:
+            return None
+        try:
+            return cls.build(path, ids, vectors)
+        except OSError as e:
+            print(f"⚠️ Could not persist vector index {path}: {e}")
+            return cls(_normalize(vectors), ids)
+
+    @staticmethod
+    def prune(pattern: str, keep: Iterable[str]):
+        """Delete index files matching `pattern` other than those of the `keep` paths"""
+        keep_files = {file for path in keep for file in VectorIndex._paths(path)}
+        for file in glob.glob(pattern):
+            if file not in keep_files and not file.endswith('.tmp'):
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector(self, id_: Hashable) -> Optional[np.ndarray]:
+        row = self._rows.get(id_)
+        return None if row is None else np.asarray(self.vectors[row])
+
+    def build_ivf(self, n_lists: int = 0, n_probe: int = 8, iterations: int = 10, seed: int = 0):
+        """
+        Cluster the vectors with spherical k-means into `n_lists` inverted lists
+        (default about sqrt(n)); searches then score only the `n_probe` closest lists.
+        """
+        n = len(self.ids)
+        if n == 0:
+            return
+        n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        centroids = np.array(self.vectors[np.sort(rng.choice(n, n_lists, replace=False))])
+
+        for _ in range(iterations):
+            assignment = self._assign(centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            empty = np.flatnonzero(np.bincount(assignment, minlength=n_lists) == 0)
+            if len(empty):
+                # Re-seed empty lists with random vectors instead of leaving dead centroids
+                sums[empty] = self.vectors[rng.choice(n, len(empty), replace=False)]
+            centroids = _normalize(sums)
+
+        assignment = self._assign(centroids)
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self._centroids = centroids
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(n_lists)]
+        self.n_probe = max(1, min(n_probe, n_lists))
+
+    def _assign(self, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Index of the closest centroid for every vector, in chunks to bound memory"""
+        return np.concatenate([
+            np.argmax(self.vectors[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, len(self.ids), chunk)
+        ])
+
+    def search(self, query: np.ndarray, k: int = 10,
+               exclude: Iterable[Hashable] = ()) -> List[Tuple[Hashable, float]]:
+        """(id, cosine similarity) of the k vectors closest to `query`, best first"""
+        if k <= 0 or not self.ids:
+            return []
+        query = _normalize(query).ravel()
+
+        if self._lists is None:
+            rows = None
+            scores = self.vectors @ query
+        else:
+            probes = np.argpartition(-(self._centroids @ query), self.n_probe - 1)[:self.n_probe]
+            rows = np.sort(np.concatenate([self._lists[c] for c in probes]))
+            scores = self.vectors[rows] @ query
+
+        excluded = [self._rows[id_] for id_ in exclude if id_ in self._rows]
+        if excluded:
+            scores = np.array(scores)
+            if rows is None:
+                scores[excluded] = -np.inf
+            else:
+                scores[np.isin(rows, excluded)] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.lexsort((top, -scores[top]))]
+        top = top[np.isfinite(scores[top])]
+        return [
+            (self.ids[int(i if rows is None else rows[i])], float(scores[i]))
+            for i in top
+        ]